@@ -8,6 +8,9 @@ from PySide6.QtCore import QStandardPaths, QLockFile
 
 from src.view import MainWindow
 from src.controller import AppController
+from src.applog import get_logger
+
+log = get_logger("main")
 
 
 DETACH_FROM_CONSOLE = True
@@ -33,8 +36,7 @@ def maybe_detach_console():
 
 def excepthook(exc_type, exc, tb):
     try:
-        import traceback
-        print("Exceção não tratada:", "".join(traceback.format_exception(exc_type, exc, tb)))
+        log.critical("unhandled exception", exc_info=(exc_type, exc, tb))
     except Exception:
         pass
     try:
@@ -42,6 +44,15 @@ def excepthook(exc_type, exc, tb):
     except Exception:
         pass
 
+def show_reply(text: str) -> None:
+    # O executável é gerado sem console (stdout None): a resposta vai numa
+    # caixa, exceto o "ok" dos verbos de controle (atalhos, tarefas agendadas)
+    if sys.stdout is not None:
+        print(text)
+    elif text != "ok":
+        from PySide6.QtWidgets import QMessageBox
+        QMessageBox.information(None, "Random Images", text)
+
 def single_instance_lock() -> QLockFile | None:
     lock_dir = Path(QStandardPaths.writableLocation(QStandardPaths.TempLocation))
     lock_dir.mkdir(parents=True, exist_ok=True)
@@ -49,11 +60,24 @@ def single_instance_lock() -> QLockFile | None:
     lock = QLockFile(str(lock_path))
     lock.setStaleLockTime(30_000)
     if not lock.tryLock(1):
-        # já existe uma instância; mensagem curta e sair
+        # já existe uma instância: encaminha os verbos (ou "show") pelo canal local
         app = QApplication(sys.argv)
-        from PySide6.QtWidgets import QMessageBox
-        QMessageBox.information(None, "Info", "Already running.")
+        from src.ipc import send_command
+        args = sys.argv[1:]
+        reply = send_command(args or ["show"])
+        if reply is None:
+            from PySide6.QtWidgets import QMessageBox
+            QMessageBox.information(None, "Info", "Already running.")
+        elif args:
+            show_reply(reply)
         sys.exit(0)
+    # primeira instância: verbos de controle não têm a quem ir, e abrir o app
+    # (com autoplay) no lugar de "stop"/"status" faria o contrário do pedido
+    args = sys.argv[1:]
+    if args and args[0].lower() != "show":
+        app = QApplication(sys.argv)
+        show_reply("not running")
+        sys.exit(1)
     return lock
 
 def main():
@@ -75,8 +99,8 @@ def main():
     # Execução protegida
     try:
         rc = app.exec()
-    except Exception as e:
-        print("Falha no loop principal:", repr(e))
+    except Exception:
+        log.exception("main loop failed")
         rc = 1
     finally:
         try:
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import os
+import sys
+import time
+import queue
+import logging
+import logging.handlers
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, List, Tuple
+
+# Logger raiz do app; módulos usam get_logger(__name__) -> "random_images.<módulo>"
+ROOT_LOGGER = "random_images"
+LOG_FILE_ENV = "RANDOM_IMAGES_LOG"  # caminho do arquivo rotativo (opcional)
+LOG_LEVEL_ENV = "RANDOM_IMAGES_LOG_LEVEL"  # ex.: DEBUG (padrão INFO)
+
+RING_SIZE = 2000
+RATE_BURST = 5         # mensagens iguais permitidas por janela
+RATE_PERIOD = 10.0     # segundos
+FILE_MAX_BYTES = 1_000_000
+FILE_BACKUPS = 3
+
+# (seq, created, nível, logger, mensagem, campos)
+Entry = Tuple[int, float, str, str, str, Dict]
+
+
+def get_logger(name: str) -> logging.Logger:
+    short = name.rsplit(".", 1)[-1]
+    return logging.getLogger(f"{ROOT_LOGGER}.{short}")
+
+
+# ---------- Limite de taxa ----------
+# Chave = (logger, mensagem sem formatação); campos variáveis vão em extra={"fields": ...}.
+# A decisão fica gravada no record para que vários handlers compartilhem o filtro.
+class RateLimitFilter(logging.Filter):
+    def __init__(self, burst: int = RATE_BURST, period: float = RATE_PERIOD):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._lock = Lock()
+        self._janelas: Dict[Tuple[str, str], List] = {}  # chave -> [início, contagem, suprimidas]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ok = getattr(record, "_rl_ok", None)
+        if ok is not None:
+            return ok
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            j = self._janelas.get(key)
+            if j is None or now - j[0] >= self.period:
+                suprimidas = j[2] if j else 0
+                self._janelas[key] = [now, 1, 0]
+                if len(self._janelas) > 4 * RING_SIZE:
+                    self._janelas = {k: v for k, v in self._janelas.items() if now - v[0] < self.period}
+                if suprimidas:
+                    record.suppressed = suprimidas
+                ok = True
+            elif j[1] < self.burst:
+                j[1] += 1
+                ok = True
+            else:
+                j[2] += 1
+                ok = False
+        record._rl_ok = ok
+        return ok
+
+
+# ---------- Buffer circular ----------
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity: int = RING_SIZE):
+        super().__init__()
+        self._buf: Deque[Entry] = deque(maxlen=capacity)
+        self._seq = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = record.getMessage()
+            if record.exc_info:
+                msg += "\n" + logging.Formatter().formatException(record.exc_info)
+            fields = dict(getattr(record, "fields", None) or {})
+            if getattr(record, "suppressed", 0):
+                fields["suppressed"] = record.suppressed
+            with self.lock:
+                self._seq += 1
+                self._buf.append((self._seq, record.created, record.levelname, record.name, msg, fields))
+        except Exception:
+            self.handleError(record)
+
+    def entries(self, since: int = 0) -> List[Entry]:
+        with self.lock:
+            if since <= 0:
+                return list(self._buf)
+            return [e for e in self._buf if e[0] > since]
+
+
+class _FieldsFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        s = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            s += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if getattr(record, "suppressed", 0):
+            s += f" (+{record.suppressed} suppressed)"
+        return s
+
+
+def format_entry(e: Entry) -> str:
+    _, created, level, name, msg, fields = e
+    ts = time.strftime("%H:%M:%S", time.localtime(created))
+    extra = " ".join(f"{k}={v}" for k, v in fields.items())
+    return f"{ts} {level:<7} {name.split('.')[-1]}: {msg}" + (f"  [{extra}]" if extra else "")
+
+
+# ---------- Configuração ----------
+_RING: RingBufferHandler | None = None
+_LISTENER: logging.handlers.QueueListener | None = None
+
+
+def ring() -> RingBufferHandler | None:
+    return _RING
+
+
+def level() -> int:
+    return logging.getLogger(ROOT_LOGGER).getEffectiveLevel()
+
+
+def setup_logging(log_file: str | None = None, console: bool = True) -> RingBufferHandler:
+    # Idempotente. Arquivo e console são escritos pela thread do QueueListener,
+    # nunca pela thread que chamou o logger.
+    global _RING, _LISTENER
+    if _RING is not None:
+        return _RING
+    root = logging.getLogger(ROOT_LOGGER)
+    nivel = os.environ.get(LOG_LEVEL_ENV, "").strip().upper()
+    root.setLevel(nivel if nivel in ("DEBUG", "INFO", "WARNING", "ERROR") else logging.INFO)
+    root.propagate = False
+
+    rate = RateLimitFilter()
+    _RING = RingBufferHandler()
+    _RING.addFilter(rate)
+    root.addHandler(_RING)
+
+    fmt = _FieldsFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    sinks: List[logging.Handler] = []
+    log_file = log_file or os.environ.get(LOG_FILE_ENV, "").strip() or None
+    if log_file:
+        try:
+            fh = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=FILE_MAX_BYTES, backupCount=FILE_BACKUPS, encoding="utf-8"
+            )
+            fh.setFormatter(fmt)
+            sinks.append(fh)
+        except OSError:
+            pass
+    if console and sys.stderr is not None:
+        sh = logging.StreamHandler(sys.stderr)
+        sh.setFormatter(fmt)
+        sinks.append(sh)
+    if sinks:
+        q: queue.SimpleQueue = queue.SimpleQueue()
+        qh = logging.handlers.QueueHandler(q)
+        qh.addFilter(rate)
+        root.addHandler(qh)
+        _LISTENER = logging.handlers.QueueListener(q, *sinks, respect_handler_level=True)
+        _LISTENER.start()
+    return _RING
+
+
+def shutdown_logging() -> None:
+    global _LISTENER
+    if _LISTENER is not None:
+        try:
+            _LISTENER.stop()
+        except Exception:
+            pass
+        _LISTENER = None
@@ -1,21 +1,33 @@
 import os
 import json
 import atexit
+import time
 import signal
 import subprocess
 from pathlib import Path
 from threading import Event, Thread
-from typing import List
+from typing import Dict, List
 
 from PySide6.QtCore import QTimer, QAbstractNativeEventFilter, QByteArray
 from PySide6.QtWidgets import QApplication
 
 from .model import (
-    executar_multimonitor_com_stop, is_wallpaper_engine_running,
+    executar_multimonitor_com_stop, is_wallpaper_engine_running, PipelineControl, SPAWN_BUDGET,
+    listing_cache_stats, REAPER,
 )
+from .ipc import ControlServer
+from .applog import get_logger, setup_logging, shutdown_logging
+from .trace import open_trace_from_env
+from . import profiling
+from .profiling import instrument
 from .view import MainWindow, CONFIG_FILE
 
+log = get_logger(__name__)
+
 SUPPRESS_UI_ON_SHUTDOWN = True  # não abrir messagebox ao desligar
+PROFILE_WINDOW_S = 60.0  # janela do profiling pedido pelo tray
+PREVIEW_POLL_MS = 1500   # leitura das imagens publicadas pelos pipelines
+FINAL_FADE_TIMEOUT = 2.0  # prazo único do fade final de todos os monitores (thread da GUI)
 
 # ---------- Filtro para fim de sessão (Windows) ----------
 class WinSessionEndFilter(QAbstractNativeEventFilter):
@@ -42,7 +54,19 @@ class AppController:
         self.worker_thread: Thread | None = None
         self.stop_event: Event | None = None
         self.current_cfgs: List[dict] | None = None
+        self.controls: Dict[str, PipelineControl] = {}
         self.in_shutdown = False
+        setup_logging()
+
+        # prévias: lê o que cada pipeline publicou (sem tocar na thread do worker)
+        self._preview_versions: Dict[str, int] = {}
+        self._preview_timer = QTimer(app)
+        self._preview_timer.setInterval(PREVIEW_POLL_MS)
+        self._preview_timer.timeout.connect(self._refresh_previews)
+
+        # canal de controle para segundas instâncias (main.py encaminha argv)
+        self.ipc = ControlServer(self.handle_command, parent=app)
+        self.ipc.listen()
 
         # conexões
         win.startRequested.connect(self.start_worker)
@@ -50,10 +74,14 @@ class AppController:
         win.loadRequested.connect(self.load_config_dialog)
         win.saveRequested.connect(self.save_config_dialog)
         win.exitRequested.connect(self.exit_app)
+        win.profileRequested.connect(self.start_profile)
 
         # instale handlers globais
         self._install_global_handlers()
 
+        # profiling já no início se pedido pelo ambiente
+        profiling.start_from_env(on_done=self._profile_done)
+
     # ---------- Config helpers ----------
     def _read_config_file(self, path: Path) -> tuple[bool, List[dict]]:
         with open(path, "r", encoding="utf-8") as f:
@@ -92,6 +120,10 @@ class AppController:
         if not cfgs:
             return
         creationflags = 0x08000000 if os.name == "nt" else 0
+        # todos os monitores em paralelo; quem passar do prazo é morto e
+        # coletado pelo REAPER, a GUI não espera
+        prazo = time.monotonic() + FINAL_FADE_TIMEOUT
+        filhos = []
         for cfg in cfgs:
             exe_path = cfg.get("exe_path", "")
             monitor = cfg.get("monitor", "")
@@ -102,11 +134,28 @@ class AppController:
             raw = f'RAW~({{"{fadename}":1.00}})~END'
             cmd = prefix + raw
             try:
-                subprocess.run(cmd, shell=False, creationflags=creationflags)
+                filhos.append((monitor, subprocess.Popen(cmd, shell=False, creationflags=creationflags)))
             except Exception as e:
-                print("Falha no fade final:", e)
+                log.warning("final fade failed", extra={"fields": {"monitor": monitor, "error": repr(e)}})
+        for monitor, p in filhos:
+            try:
+                p.wait(timeout=max(0.0, prazo - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                REAPER.kill(p, hung=True)
+                log.warning("final fade timed out", extra={"fields": {"monitor": monitor}})
+
+    # ---------- Profiling ----------
+    def start_profile(self):
+        if not profiling.start_session(PROFILE_WINDOW_S, on_done=self._profile_done):
+            self.win.show_info("Info", "Profiling already running.")
+
+    def _profile_done(self, path: Path):
+        # chamado na thread do profiler; o sinal entrega na thread da UI
+        log.info("profile written", extra={"fields": {"path": str(path)}})
+        self.win.profileFinished.emit(str(path))
 
     # ---------- Execução ----------
+    @instrument("controller.start")
     def start_worker(self):
         if self.worker_thread and self.worker_thread.is_alive():
             if not (SUPPRESS_UI_ON_SHUTDOWN and self.in_shutdown):
@@ -127,24 +176,98 @@ class AppController:
                 self.win.show_warning("Warning", f"Failed to save config: {e}")
 
         self.stop_event = Event()
+        self.controls = {}
+        trace = open_trace_from_env()
         def run():
             try:
-                executar_multimonitor_com_stop(cfgs, self.stop_event)
-            except Exception as e:
-                print("Erro de execução:", e)
+                executar_multimonitor_com_stop(cfgs, self.stop_event, trace, self.controls)
+            except Exception:
+                log.exception("worker failed")
+            finally:
+                if trace is not None:
+                    trace.close()
 
         self.worker_thread = Thread(target=run, daemon=True)
         self.worker_thread.start()
+        self._preview_versions = {}
+        self._preview_timer.start()
         self._toggle_controls(False)
 
+    @instrument("controller.stop")
     def stop_worker(self):
         if self.stop_event:
             self.stop_event.set()
+        for ctl in list(self.controls.values()):
+            ctl.interrupt()
         if self.worker_thread:
             self.worker_thread.join(timeout=2.0)
+        self.controls = {}
+        self._preview_timer.stop()
+        self.win.clear_previews()
         self._apply_final_fade()
         self._toggle_controls(True)
 
+    def _refresh_previews(self):
+        mudou = False
+        for m, ctl in list(self.controls.items()):
+            if self._preview_versions.get(m) == ctl.versao:
+                continue
+            self._preview_versions[m] = ctl.versao
+            self.win.show_previews(m, ctl.atual, ctl.proximas)
+            mudou = True
+        if mudou:
+            linhas = []
+            for m, ctl in list(self.controls.items()):
+                for k, p in ctl.atual.items():
+                    nxt = ctl.proximas.get(k, "")
+                    linhas.append(f"{m} {k}: {Path(p).name} → {Path(nxt).name if nxt else '-'}")
+            self.win.set_tray_status(linhas)
+
+    def is_running(self) -> bool:
+        return bool(self.worker_thread and self.worker_thread.is_alive())
+
+    # ---------- Comandos (IPC) ----------
+    # show | start | stop | status | next|pause|resume|reload [monitor]
+    def handle_command(self, args: List[str]) -> str:
+        verb = (args[0] if args else "show").lower()
+        log.info("control command", extra={"fields": {"args": " ".join(args)}})
+        if verb == "show":
+            self.win.restore_from_tray()
+            return "ok"
+        if verb == "start":
+            if self.is_running():
+                return "already running"
+            self.start_worker()
+            return "ok" if self.is_running() else "error: not started"
+        if verb == "stop":
+            self.stop_worker()
+            return "ok"
+        if verb == "status":
+            if not self.is_running():
+                return "stopped"
+            # cópia: a thread do worker ainda pode estar preenchendo controls
+            controls = list(self.controls.items())
+            paused = [m for m, c in controls if c.paused]
+            st = SPAWN_BUDGET.stats()
+            cs = listing_cache_stats()
+            rs = REAPER.stats()
+            return (f"running monitors={','.join(m for m, _ in controls)} paused={','.join(paused) or '-'} "
+                    f"spawns={st['spawns']} waited={st['waited']} wait_max={st['wait_max_s']}s "
+                    f"cache={cs['entries']} ({cs['bytes'] // 1024} KiB, pinned={cs['pinned']}) "
+                    f"hits={cs['hits']} misses={cs['misses']} evicted={cs['evictions']} "
+                    f"hung={rs['hung']} reaping={rs['reaping']}")
+        if verb in ("next", "pause", "resume", "reload"):
+            if not self.is_running():
+                return "not running"
+            alvo = args[1] if len(args) > 1 and args[1].lower() != "all" else None
+            if alvo is not None and alvo not in self.controls:
+                return f"unknown monitor: {alvo}"
+            for m, ctl in list(self.controls.items()):
+                if alvo is None or m == alvo:
+                    getattr(ctl, verb)()
+            return "ok"
+        return f"unknown command: {verb}"
+
     def _toggle_controls(self, enabled: bool):
         for btn in [self.win.btn_add, self.win.btn_del, self.win.btn_load, self.win.btn_save, self.win.btn_start]:
             btn.setEnabled(enabled)
@@ -194,6 +317,8 @@ class AppController:
     # ---------- sinais de sessão/sistema ----------
     def begin_shutdown(self):
         self.in_shutdown = True
+        profiling.stop_session()
+        self.ipc.close()
         try:
             self.win.mark_shutdown()
             self.win.mark_tray_quit()
@@ -229,7 +354,8 @@ class AppController:
                 except Exception:
                     pass
 
-        # atexit para garantir fade final
+        # atexit para garantir fade final (antes de parar o log)
+        atexit.register(shutdown_logging)
         atexit.register(lambda: self._apply_final_fade())
 
     # ---------- utilidade de inicialização ----------
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import json
+from typing import Callable, List
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from .applog import get_logger
+
+# Canal local de controle da instância em execução. Protocolo: o cliente
+# envia uma linha JSON com a lista de verbos (argv) e recebe uma linha de texto.
+SERVER_NAME = "random_images_wallpaper_ctl"
+CLIENT_TIMEOUT_MS = 2000
+MAX_REQUEST = 64 * 1024
+
+log = get_logger(__name__)
+
+
+class ControlServer(QObject):
+    def __init__(self, handler: Callable[[List[str]], str], parent: QObject | None = None):
+        super().__init__(parent)
+        self.handler = handler
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+
+    def listen(self) -> bool:
+        if self.server.listen(SERVER_NAME):
+            return True
+        # socket órfão de uma execução anterior que caiu
+        QLocalServer.removeServer(SERVER_NAME)
+        ok = self.server.listen(SERVER_NAME)
+        if not ok:
+            log.warning("control server not listening", extra={"fields": {"error": self.server.errorString()}})
+        return ok
+
+    def close(self) -> None:
+        self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            sock.readyRead.connect(lambda s=sock: self._on_ready_read(s))
+            sock.disconnected.connect(sock.deleteLater)
+
+    def _on_ready_read(self, sock: QLocalSocket):
+        if not sock.canReadLine():
+            if sock.bytesAvailable() > MAX_REQUEST:
+                sock.abort()
+            return
+        line = bytes(sock.readLine()).decode("utf-8", "replace").strip()
+        try:
+            args = json.loads(line)
+            if not isinstance(args, list):
+                raise ValueError("expected a list")
+            reply = self.handler([str(a) for a in args])
+        except Exception as e:
+            log.warning("bad control request", extra={"fields": {"error": repr(e)}})
+            reply = f"error: {e}"
+        sock.write((reply.replace("\n", " ") + "\n").encode("utf-8"))
+        sock.flush()
+        sock.disconnectFromServer()
+
+
+def send_command(args: List[str], timeout_ms: int = CLIENT_TIMEOUT_MS) -> str | None:
+    # None se não houver instância escutando
+    sock = QLocalSocket()
+    sock.connectToServer(SERVER_NAME)
+    if not sock.waitForConnected(timeout_ms):
+        return None
+    sock.write((json.dumps(args) + "\n").encode("utf-8"))
+    if not sock.waitForBytesWritten(timeout_ms):
+        sock.abort()
+        return None
+    buf = b""
+    while b"\n" not in buf:
+        if not sock.waitForReadyRead(timeout_ms):
+            break
+        buf += bytes(sock.readAll())
+    sock.disconnectFromServer()
+    return buf.decode("utf-8", "replace").strip() or None
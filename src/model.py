@@ -1,14 +1,24 @@
 from __future__ import annotations
 import os
+import glob
+import heapq
 import time
+import itertools
 import json
 import random
 import subprocess
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from decimal import Decimal, ROUND_HALF_UP
 from pathlib import Path
-from threading import Thread, Event
+from threading import Thread, Event, Lock, BoundedSemaphore, local
 from typing import Dict, List, Tuple, Iterator, Union
 
+from .applog import get_logger
+from .profiling import instrument, record_hook
+from .trace import TraceRecorder, split_exe
+
 # --------- Tipos e metadados básicos ---------
 VERSION = "1.1.0"
 APP_NAME = "Random Images • For Wallpaper Engine"
@@ -16,31 +26,927 @@ APP_ICON_FILE = "icon.ico"
 WEBSITE = "https://rafaelneves.dev.br"
 
 Item = Tuple[str, Union[str, float]]  # ("cmd", comando) ou ("sleep", segundos)
+SOURCE_SEP = "|"  # várias fontes num valor de prop (caractere inválido em caminhos do Windows)
+
+log = get_logger(__name__)
+
+# ---------- Relógio ----------
+# Todas as esperas do executor passam por aqui para que o soak possa simular
+# semanas de rotação sem dormir de verdade.
+class Clock:
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def wait(self, event: Event | None, timeout: float | None) -> bool:
+        # True se o evento foi sinalizado
+        if event is None:
+            time.sleep(timeout or 0.0)
+            return False
+        return event.wait(timeout)
+
+
+# Tempo simulado por thread: cada pipeline tem sua própria linha do tempo e
+# as esperas com timeout avançam o relógio na hora.
+class VirtualClock(Clock):
+    def __init__(self, start: float = 0.0):
+        self.start = start
+        self._local = local()
+
+    def monotonic(self) -> float:
+        return getattr(self._local, "now", self.start)
+
+    def advance(self, dt: float) -> None:
+        self._local.now = self.monotonic() + max(0.0, dt)
+
+    def wait(self, event: Event | None, timeout: float | None) -> bool:
+        if event is not None and event.is_set():
+            return True
+        if timeout is None:
+            # espera indefinida (pausa) só termina com o evento real
+            return event.wait() if event is not None else False
+        self.advance(timeout)
+        return event.is_set() if event is not None else False
+
+
+SYSTEM_CLOCK = Clock()
+
+# ---------- Listagem compacta ----------
+# Acesso comum a listagens e visões: subclasses dão __len__, name() e _path().
+class _ListingBase:
+    __slots__ = ()
+
+    def __getitem__(self, i: int) -> str:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("listing index out of range")
+        return self._path(i)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._path(i)
+
+    def _chave_ordem(self, i: int) -> Tuple[str, str]:
+        # chave da ordem das listagens (sem caixa, desempate pelo nome)
+        n = self.name(i)
+        return (n.lower(), n)
+
+    def posicao_apos(self, nome: str) -> int:
+        # primeiro índice cujo nome vem depois de `nome` na ordem da listagem
+        alvo = (nome.lower(), nome)
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._chave_ordem(mid) <= alvo:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+# Todos os arquivos de uma pasta: prefixo guardado uma vez, nomes empacotados
+# num único buffer UTF-8 com offsets e um id de extensão por entrada. O caminho
+# completo só é montado no acesso. Filtros por extensão são ImageView por cima.
+class ImageListing(_ListingBase):
+    __slots__ = ("pasta", "chave", "_prefix", "_buf", "_offs", "_ext", "_ext_ids", "_views")
+
+    def __init__(self, pasta: str, nomes: List[str], chave: str | None = None):
+        self.pasta = pasta
+        self.chave = chave  # chave no _DIR_CACHE (None = listagem avulsa, ex.: arquivos de um glob)
+        self._prefix = pasta if pasta.endswith("/") else pasta + "/"
+        nomes.sort(key=lambda n: (n.lower(), n))
+        buf = bytearray()
+        offs = array("L", [0])
+        ext = array("H")
+        ext_ids: Dict[str, int] = {}
+        for n in nomes:
+            buf += n.encode("utf-8", "surrogatepass")
+            offs.append(len(buf))
+            ext.append(ext_ids.setdefault(os.path.splitext(n)[1].lower(), len(ext_ids)))
+        self._buf = bytes(buf)
+        self._offs = offs
+        self._ext = ext
+        self._ext_ids = ext_ids
+        self._views: Dict[Tuple[str, ...], ImageView] = {}
+
+    def __len__(self) -> int:
+        return len(self._offs) - 1
+
+    def name(self, i: int) -> str:
+        o = self._offs
+        return self._buf[o[i]:o[i + 1]].decode("utf-8", "surrogatepass")
+
+    def _path(self, i: int) -> str:
+        return self._prefix + self.name(i)
+
+    def view(self, exts: Tuple[str, ...]) -> ImageView:
+        # uma visão por conjunto de extensões, guardada junto da listagem
+        v = self._views.get(exts)
+        if v is None:
+            ids = {self._ext_ids[e] for e in exts if e in self._ext_ids}
+            if len(ids) == len(self._ext_ids):
+                idx = None  # todas as entradas passam: sem array
+            else:
+                idx = array("L", (i for i, e in enumerate(self._ext) if e in ids))
+            v = self._views.setdefault(exts, ImageView(self, idx, (self.chave, exts)))
+        return v
+
+    @property
+    def nbytes(self) -> int:
+        n = len(self._buf) + self._offs.itemsize * len(self._offs) + self._ext.itemsize * len(self._ext)
+        # cópia antes de somar: view() insere de outras threads (varreduras,
+        # executores) enquanto o cache calcula o tamanho
+        return n + len(self._prefix) + sum(v.nbytes for v in list(self._views.values()))
+
+
+# Subconjunto de uma ImageListing (ex.: só .jpg/.png): array de índices ou,
+# se tudo passa, a própria listagem.
+class ImageView(_ListingBase):
+    __slots__ = ("base", "idx", "chave")
+
+    def __init__(self, base: ImageListing, idx: array | None, chave: Tuple):
+        self.base = base
+        self.idx = idx
+        self.chave = chave  # (pasta normalizada, extensões)
+
+    @property
+    def pasta(self) -> str:
+        return self.base.pasta
+
+    def __len__(self) -> int:
+        return len(self.base) if self.idx is None else len(self.idx)
+
+    def name(self, i: int) -> str:
+        return self.base.name(i if self.idx is None else self.idx[i])
+
+    def _path(self, i: int) -> str:
+        return self.base._path(i if self.idx is None else self.idx[i])
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self.idx is None else self.idx.itemsize * len(self.idx)
+
 
 # ---------- Cache de diretórios ----------
-_DIR_CACHE: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+# Cada pasta é varrida numa thread própria com timeout. Se a varredura
+# travar (NAS dormindo) ou falhar, a última listagem boa continua valendo e
+# uma nova tentativa roda em background; quando ela chega, os cursores trocam
+# para a listagem nova na rodada seguinte. A varredura guarda todos os
+# arquivos da pasta uma única vez; cada conjunto de extensões é uma ImageView.
+SCAN_TIMEOUT = 10.0      # s por pasta
+SCAN_RETRY = 30.0        # primeira nova tentativa; dobra a cada falha
+SCAN_RETRY_MAX = 600.0
+SCAN_RETRY_TENTATIVAS = 8  # ~45 min de tentativas; depois só um reload tenta de novo
+
+# Limites do cache de listagens. Pastas em uso por um pipeline ficam fixadas
+# (pin) e nunca saem; as demais (configs antigas, pré-varreduras da GUI) saem
+# por LRU quando o cache passa de qualquer um dos limites.
+CACHE_MAX_ENTRIES = 64
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+class ListingCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("invalid cache limits")
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._d: "OrderedDict[str, ImageListing]" = OrderedDict()
+        self._pins: Dict[str, int] = {}  # chave -> nº de pipelines usando
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> ImageListing | None:
+        # consulta contabilizada: conta hit/miss e marca como usada
+        with self._lock:
+            v = self._d.get(key)
+            if v is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._d.move_to_end(key)
+            return v
+
+    def peek(self, key: str) -> ImageListing | None:
+        # sem contadores nem LRU (checagens a cada rodada dos cursores)
+        with self._lock:
+            return self._d.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._d
+
+    def __setitem__(self, key: str, listing: ImageListing) -> None:
+        with self._lock:
+            self._d[key] = listing
+            self._d.move_to_end(key)
+            self._evict()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._d)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._d.clear()
 
-def list_images_cached(pasta: Path, extensoes: Tuple[str, ...]) -> List[str]:
-    key = (str(pasta.resolve()), tuple(sorted(e.lower() for e in extensoes)))
-    if key in _DIR_CACHE:
-        return _DIR_CACHE[key]
+    def pinned(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pins
+
+    def pin(self, key: str) -> None:
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key: str) -> None:
+        with self._lock:
+            n = self._pins.get(key, 0) - 1
+            if n > 0:
+                self._pins[key] = n
+            else:
+                self._pins.pop(key, None)
+            self._evict()
+
+    def revalidar(self) -> None:
+        # uma visão nova aumenta o nbytes de uma listagem já guardada
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        # chamado com o lock; da menos para a mais recentemente usada
+        total = sum(v.nbytes for v in self._d.values())
+        for key in list(self._d):
+            if len(self._d) <= self.max_entries and total <= self.max_bytes:
+                break
+            if key in self._pins:
+                continue
+            total -= self._d.pop(key).nbytes
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._d),
+                "bytes": sum(v.nbytes for v in self._d.values()),
+                "pinned": sum(1 for k in self._pins if k in self._d),
+                "pins": len(self._pins),  # inclui pastas ainda sem listagem (varrendo/inacessíveis)
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_DIR_CACHE = ListingCache()  # pasta normalizada -> todos os arquivos
+
+def listing_cache_stats() -> dict:
+    return _DIR_CACHE.stats()
+_SCAN_LOCK = Lock()
+_INFLIGHT: Dict[str, Future] = {}
+_RETRYING: set = set()
+
+def _cache_key(pasta: Path) -> str:
+    # sem resolve(): montar a chave não pode tocar no disco/rede
+    return os.path.normcase(os.path.abspath(pasta))
+
+def _norm_exts(extensoes: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(sorted({e.lower() for e in extensoes}))
+
+def _visao(base: ImageListing, exts: Tuple[str, ...]) -> ImageView:
+    nova = exts not in base._views
+    v = base.view(exts)
+    if nova and base.chave is not None:
+        _DIR_CACHE.revalidar()
+    return v
+
+def _view_for(chave: Tuple) -> ImageView | None:
+    # visão atual para (pasta, extensões), se a pasta estiver no cache
+    base = _DIR_CACHE.peek(chave[0])
+    return _visao(base, chave[1]) if base is not None else None
+
+def _scan_pasta(pasta: Path, key: str) -> ImageListing:
     if not pasta.exists() or not pasta.is_dir():
         raise FileNotFoundError(f"Invalid folder: {pasta}")
-    imgs: List[Tuple[str, str]] = []
+    nomes: List[str] = []
     with os.scandir(pasta) as it:
         for entry in it:
             if entry.is_file():
-                _, ext = os.path.splitext(entry.name)
-                if ext.lower() in key[1]:
-                    imgs.append((entry.name, Path(entry.path).as_posix()))
-    if not imgs:
+                nomes.append(entry.name)
+    return ImageListing(pasta.as_posix(), nomes, key)
+
+def _submit_scan(key: str, pasta: Path) -> Future:
+    # uma varredura em andamento por pasta; chamadas concorrentes compartilham o Future
+    with _SCAN_LOCK:
+        fut = _INFLIGHT.get(key)
+        if fut is not None:
+            return fut
+        fut = Future()
+        _INFLIGHT[key] = fut
+
+    def run():
+        try:
+            listing = _scan_pasta(pasta, key)
+            _DIR_CACHE[key] = listing
+            fut.set_result(listing)
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with _SCAN_LOCK:
+                _INFLIGHT.pop(key, None)
+
+    Thread(target=run, name="scan", daemon=True).start()
+    return fut
+
+def _agendar_retry(key: str, pasta: Path) -> None:
+    # Termina quando a varredura volta, quando a pasta comprovadamente não
+    # existe, quando nenhum pipeline usa mais a pasta (pin) ou após
+    # SCAN_RETRY_TENTATIVAS; digitação parcial na GUI não deixa threads para trás.
+    with _SCAN_LOCK:
+        if key in _RETRYING:
+            return
+        _RETRYING.add(key)
+
+    def run():
+        espera = SCAN_RETRY
+        try:
+            for _ in range(SCAN_RETRY_TENTATIVAS):
+                time.sleep(espera)
+                if not _DIR_CACHE.pinned(key):
+                    return
+                try:
+                    _submit_scan(key, pasta).result(SCAN_TIMEOUT)
+                    log.info("folder scan recovered", extra={"fields": {"folder": str(pasta)}})
+                    return
+                except FileNotFoundError:
+                    log.warning("folder no longer exists, retry stopped", extra={"fields": {"folder": str(pasta)}})
+                    return
+                except (OSError, FutureTimeout):
+                    espera = min(espera * 2, SCAN_RETRY_MAX)
+            log.warning("folder still unreachable, retry stopped", extra={"fields": {"folder": str(pasta)}})
+        finally:
+            with _SCAN_LOCK:
+                _RETRYING.discard(key)
+
+    Thread(target=run, name="scan-retry", daemon=True).start()
+
+def _em_thread(fn, nome: str) -> Future:
+    # roda fn numa thread daemon; quem chama espera o Future com timeout
+    fut: Future = Future()
+
+    def run():
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+
+    Thread(target=run, name=nome, daemon=True).start()
+    return fut
+
+def _tipo(path: Path) -> str:
+    try:
+        return "dir" if path.is_dir() else "file" if path.exists() else "missing"
+    except OSError:
+        return "missing"
+
+def _classificar(path: Path, timeout: float | None = None) -> str:
+    # "dir" | "file" | "missing" | "timeout", sem bloquear mais que `timeout`
+    if _cache_key(path) in _DIR_CACHE:
+        return "dir"
+    try:
+        return _em_thread(lambda: _tipo(path), "stat").result(SCAN_TIMEOUT if timeout is None else timeout)
+    except FutureTimeout:
+        return "timeout"
+
+@instrument("list_images_cached")
+def list_images_cached(
+    pasta: Path,
+    extensoes: Tuple[str, ...],
+    refresh: bool = False,
+    timeout: float | None = None,
+) -> ImageView:
+    key = _cache_key(pasta)
+    exts = _norm_exts(extensoes)
+    base = _DIR_CACHE.get(key)
+    if base is not None and not refresh and not len(_visao(base, exts)):
+        # listagem guardada sem nenhuma imagem: a pasta pode ter ganho
+        # arquivos desde então, varre de novo antes de dar erro
+        refresh = True
+    if base is None or refresh:
+        antigo = base
+        try:
+            base = _submit_scan(key, pasta).result(SCAN_TIMEOUT if timeout is None else timeout)
+        except FutureTimeout:
+            _agendar_retry(key, pasta)
+            if antigo is None:
+                raise TimeoutError(f"Folder scan timed out: {pasta}")
+            log.warning("folder scan timed out, using last listing", extra={"fields": {"folder": str(pasta)}})
+        except OSError as e:
+            if antigo is None:
+                raise
+            _agendar_retry(key, pasta)
+            log.warning("folder scan failed, using last listing", extra={"fields": {"folder": str(pasta), "error": str(e)}})
+    v = _visao(base, exts)
+    if not len(v):
         raise FileNotFoundError(f"No valid images found in: {pasta}")
-    imgs.sort(key=lambda t: t[0])
-    paths = [p for _, p in imgs]
-    _DIR_CACHE[key] = paths
-    return paths
+    return v
+
+
+# Cursor de rotação: ordem alfabética (índice direto) ou embaralhada (array de índices)
+class _Rotacao:
+    __slots__ = ("imgs", "ordem", "i")
+
+    def __init__(self, imgs: _ListingBase, aleatorio: bool):
+        self.imgs = imgs
+        self.i = 0
+        self.ordem: array | None = None
+        if aleatorio:
+            self.ordem = array("L", range(len(imgs)))
+            random.shuffle(self.ordem)
+
+    def espiar(self) -> str:
+        # próxima imagem sem avançar o cursor
+        return self.imgs[self.ordem[self.i] if self.ordem is not None else self.i]
+
+    def proximo(self) -> str:
+        idx = self.ordem[self.i] if self.ordem is not None else self.i
+        self.i += 1
+        if self.i >= (len(self.ordem) if self.ordem is not None else len(self.imgs)):
+            self.i = 0
+            if self.ordem is not None:
+                if len(self.ordem) != len(self.imgs):
+                    self.ordem = array("L", range(len(self.imgs)))
+                random.shuffle(self.ordem)
+        return self.imgs[idx]
+
+    def atualizar_do_cache(self) -> None:
+        novo = _view_for(self.imgs.chave) if self.imgs.chave is not None else None
+        if novo is not None and novo is not self.imgs and len(novo):
+            self.trocar(novo)
+
+    def trocar(self, novo: _ListingBase) -> None:
+        # Troca a listagem mantendo a posição: alfabética continua após o último
+        # nome mostrado; embaralhada termina a passada sem repetir o que já saiu.
+        antigo = self.imgs
+        if self.ordem is None:
+            self.i = novo.posicao_apos(antigo.name(self.i - 1)) if self.i > 0 else 0
+            if self.i >= len(novo):
+                self.i = 0
+        else:
+            # o que já saiu na passada é marcado por índice da listagem antiga e
+            # casado com a nova num merge das duas (ambas ordenadas), sem
+            # decodificar todos os nomes num set. A nova ordem começa pelos já
+            # vistos (cursor depois deles): uma segunda troca na mesma passada
+            # ainda sabe o que saiu antes da primeira.
+            vistos = bytearray(len(antigo))
+            for j in range(self.i):
+                vistos[self.ordem[j]] = 1
+            feitos = array("L")
+            resto = array("L")
+            a, na = 0, len(antigo)
+            ka = antigo._chave_ordem(0) if self.i and na else None
+            for j in range(len(novo)):
+                if ka is not None:
+                    kn = novo._chave_ordem(j)
+                    while ka is not None and ka < kn:
+                        a += 1
+                        ka = antigo._chave_ordem(a) if a < na else None
+                    if ka == kn and vistos[a]:
+                        feitos.append(j)
+                        continue
+                resto.append(j)
+            if not resto:
+                feitos = array("L")
+                resto = array("L", range(len(novo)))
+            random.shuffle(resto)
+            self.i = len(feitos)
+            feitos.extend(resto)
+            self.ordem = feitos
+        self.imgs = novo
+
+
+# ---------- Várias fontes por prop ----------
+def is_multi_source(spec: str) -> bool:
+    if SOURCE_SEP in spec:
+        return True
+    return glob.has_magic(spec) and not Path(spec).exists()
+
+def _partes(spec: str) -> List[str]:
+    partes = (parte.strip().strip('"').strip("'") for parte in spec.split(SOURCE_SEP))
+    return [parte for parte in partes if parte]
+
+def _expandir_parte(parte: str) -> List[Tuple[Path, str]]:
+    # Roda na thread da fonte: uma pasta, um arquivo ou um padrão glob
+    # (** recursivo), já classificados como "dir" | "file" | "missing"
+    p = Path(parte)
+    if not glob.has_magic(parte) or p.exists():
+        return [(p, "dir" if _cache_key(p) in _DIR_CACHE else _tipo(p))]
+    achados = sorted(glob.glob(parte, recursive=True))
+    if not achados:
+        raise FileNotFoundError(f"No match for: {parte}")
+    return [(Path(a), "dir" if os.path.isdir(a) else "file") for a in achados]
+
+def listar_fontes(
+    spec: str,
+    extensoes: Tuple[str, ...],
+    refresh: bool = False,
+    fixar=None,
+    pendentes: List[Tuple] | None = None,
+) -> List[_ListingBase]:
+    # Pastas vêm do cache (já ordenadas); arquivos soltos de um glob são
+    # agrupados por pasta. Fontes vazias/inválidas só falham se todas falharem.
+    # Cada parte é expandida numa thread própria; todas dividem um prazo.
+    # `fixar(chave)` é chamado antes de varrer cada pasta (pin no cache).
+    # Com `pendentes`, pastas ainda sem listagem que estouraram o prazo entram
+    # ali como (chave, extensões) em vez de erro: a nova tentativa roda em
+    # background e o cursor as inclui quando a listagem chegar ao cache.
+    exts = {e.lower() for e in extensoes}
+    listas: List[_ListingBase] = []
+    soltos: Dict[str, List[str]] = {}
+    erros: List[str] = []
+    esperando: List[Tuple] = []
+    estouros = 0
+    futs = [(parte, _em_thread(lambda parte=parte: _expandir_parte(parte), "source")) for parte in _partes(spec)]
+    prazo = time.monotonic() + SCAN_TIMEOUT
+    achados: List[Tuple[Path, str]] = []
+    ignorados = 0
+    for parte, fut in futs:
+        try:
+            achados.extend(fut.result(max(0.0, prazo - time.monotonic())))
+        except FutureTimeout:
+            if pendentes is not None and not glob.has_magic(parte):
+                # pasta (ou arquivo) que não respondeu: a varredura em
+                # background decide; um padrão glob só volta num reload
+                ck = _cache_key(Path(parte))
+                if fixar is not None:
+                    fixar(ck)
+                esperando.append((ck, _norm_exts(extensoes)))
+                _agendar_retry(ck, Path(parte))
+            else:
+                erros.append(f"Source timed out: {parte}")
+                estouros += 1
+        except OSError as e:
+            erros.append(str(e))
+    for p, tipo in achados:
+        if tipo == "dir":
+            if fixar is not None:
+                fixar(_cache_key(p))
+            try:
+                listas.append(list_images_cached(p, extensoes, refresh=refresh))
+            except TimeoutError as e:
+                # sem listagem anterior; list_images_cached já agendou a nova tentativa
+                if pendentes is not None:
+                    esperando.append((_cache_key(p), _norm_exts(extensoes)))
+                else:
+                    erros.append(str(e))
+                    estouros += 1
+            except OSError as e:
+                erros.append(str(e))
+        elif tipo == "file":
+            if os.path.splitext(p.name)[1].lower() in exts:
+                soltos.setdefault(p.parent.as_posix(), []).append(p.name)
+            else:
+                ignorados += 1
+        else:
+            erros.append(f"Invalid folder: {p}")
+    for pasta, nomes in soltos.items():
+        listas.append(ImageListing(pasta, nomes))
+    if not listas and not esperando:
+        if erros and estouros == len(erros):
+            raise TimeoutError("; ".join(erros))
+        raise FileNotFoundError("; ".join(erros) or f"No valid images found in: {spec}")
+    for e in erros:
+        log.warning("source skipped", extra={"fields": {"error": e}})
+    for ck, _ in esperando:
+        log.warning("source unreachable, waiting for background scan", extra={"fields": {"folder": ck}})
+    if pendentes is not None:
+        pendentes.extend(esperando)
+    if ignorados:
+        log.info("unsupported files skipped", extra={"fields": {"spec": spec, "files": ignorados}})
+    return listas
+
+
+# Rotação sobre várias listagens sem concatenar: alfabética = merge k-way
+# preguiçoso das listagens já ordenadas; embaralhada = intercalação
+# ponderada pelo que resta de cada fonte na passada (cada fonte com seu cursor).
+class _RotacaoMulti:
+    def __init__(self, listas: List[_ListingBase], aleatorio: bool, pendentes: List[Tuple] | None = None):
+        self.aleatorio = aleatorio
+        self.pendentes: List[Tuple] = list(pendentes or [])  # (pasta, extensões) ainda sem listagem
+        self._montar(listas)
+
+    def _montar(self, listas: List[_ListingBase], inicio: List[int] | None = None):
+        self.listas = listas
+        self._prox: Tuple | None = None
+        self._ultimo: str | None = None
+        if self.aleatorio:
+            self.rots = [_Rotacao(l, True) for l in listas]
+            self.resto = [len(l) for l in listas]
+        else:
+            self._it = self._merge(inicio or [0] * len(listas))
+
+    def _merge(self, inicio: List[int]):
+        def fonte(j: int, lst: _ListingBase, ini: int):
+            for i in range(ini, len(lst)):
+                n = lst.name(i)
+                yield (n.lower(), n, j, i)
+        return heapq.merge(*(fonte(j, l, s) for j, (l, s) in enumerate(zip(self.listas, inicio))))
+
+    def _puxar(self) -> Tuple:
+        if self.aleatorio:
+            total = sum(self.resto)
+            if total == 0:
+                self.resto = [len(r.imgs) for r in self.rots]
+                total = sum(self.resto)
+            x = random.randrange(total)
+            for j, r in enumerate(self.resto):
+                if x < r:
+                    self.resto[j] -= 1
+                    return (j,)
+                x -= r
+        try:
+            return next(self._it)
+        except StopIteration:
+            self._it = self._merge([0] * len(self.listas))
+            return next(self._it)
+
+    def espiar(self) -> str:
+        if self._prox is None:
+            self._prox = self._puxar()
+        t = self._prox
+        if self.aleatorio:
+            return self.rots[t[0]].espiar()
+        return self.listas[t[2]][t[3]]
+
+    def proximo(self) -> str:
+        t = self._prox if self._prox is not None else self._puxar()
+        self._prox = None
+        if self.aleatorio:
+            return self.rots[t[0]].proximo()
+        self._ultimo = t[1]
+        return self.listas[t[2]][t[3]]
+
+    def chaves(self) -> set:
+        # pastas do cache em uso: com listagem ou esperando a varredura
+        ck = {l.chave[0] for l in self.listas if l.chave is not None and l.chave[0] is not None}
+        ck.update(c[0] for c in self.pendentes)
+        return ck
+
+    def atualizar_do_cache(self) -> None:
+        novas = [(_view_for(l.chave) if l.chave is not None else None) or l for l in self.listas]
+        mudou = any(n is not l for n, l in zip(novas, self.listas))
+        # pastas pendentes cuja varredura em background chegou entram na rotação
+        for c in list(self.pendentes):
+            v = _view_for(c)
+            if v is not None:
+                self.pendentes.remove(c)
+                if len(v):
+                    novas.append(v)
+                    mudou = True
+        if mudou:
+            self.trocar(novas)
+
+    def trocar(self, novas: List[_ListingBase]) -> None:
+        # o item espiado ainda não saiu: devolve antes de trocar
+        if self._prox is not None and self.aleatorio:
+            self.resto[self._prox[0]] += 1
+        self._prox = None
+        if self.aleatorio:
+            if len(novas) != len(self.rots):
+                self._montar(novas)
+                return
+            for j, (rot, nova) in enumerate(zip(self.rots, novas)):
+                rot.trocar(nova)
+                self.resto[j] = len(rot.ordem) - rot.i
+            self.listas = novas
+            return
+        # alfabética: cada fonte recomeça depois do último nome entregue
+        ultimo, inicio = self._ultimo, None
+        if ultimo is not None:
+            inicio = [nova.posicao_apos(ultimo) for nova in novas]
+        self._montar(novas, inicio)
+        self._ultimo = ultimo
+
+
+# Comandos externos para um pipeline em execução (IPC / tray). "next" encerra
+# a espera atual, "pause" segura o pipeline na próxima espera, "reload"
+# revarre as pastas na hora, em background; a troca entra na próxima rodada.
+class PipelineControl:
+    def __init__(self):
+        self.wake = Event()
+        self.paused = False
+        self._skip = False
+        self._reload = False
+        self._on_reload = None  # registrado pelo pipeline (construir_script)
+        # imagens publicadas pelo pipeline a cada rodada (prévias na GUI)
+        self.atual: Dict[str, str] = {}
+        self.proximas: Dict[str, str] = {}
+        self.versao = 0
+
+    def publicar(self, atual: Dict[str, str], proximas: Dict[str, str]) -> None:
+        self.atual, self.proximas = atual, proximas
+        self.versao += 1
+
+    def next(self) -> None:
+        self._skip = True
+        self.wake.set()
+
+    def pause(self) -> None:
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+        self.wake.set()
+
+    def reload(self) -> None:
+        cb = self._on_reload
+        if cb is not None:
+            cb()
+        else:
+            self._reload = True  # pipeline ainda não começou: roda ao registrar
+
+    def ao_recarregar(self, cb) -> None:
+        self._on_reload = cb
+        if cb is not None and self.take_reload():
+            cb()
+
+    def interrupt(self) -> None:
+        self.wake.set()
+
+    def take_reload(self) -> bool:
+        r, self._reload = self._reload, False
+        return r
+
+    def sleep(self, timeout: float, stop_event: Event | None = None, clock: Clock = SYSTEM_CLOCK) -> bool:
+        # True se o stop foi sinalizado durante a espera
+        fim = clock.monotonic() + timeout
+        while True:
+            self.wake.clear()
+            if stop_event is not None and stop_event.is_set():
+                return True
+            if self._skip:
+                self._skip = False
+                return False
+            restante = fim - clock.monotonic()
+            if restante <= 0 and not self.paused:
+                return False
+            clock.wait(self.wake, restante if restante > 0 else None)
+
+# ---------- Orçamento de spawns ----------
+# Compartilhado por todos os pipelines do processo: token bucket limita
+# spawns por segundo e o semáforo limita filhos simultâneos.
+SPAWN_RATE = 20.0       # spawns por segundo (média)
+SPAWN_BURST = 8         # spawns seguidos sem esperar
+MAX_CHILDREN = 3        # processos do CLI ao mesmo tempo
+STAGGER_SEGUNDOS = 1.5  # defasagem automática entre monitores
+
+class SpawnBudget:
+    def __init__(self, rate: float = SPAWN_RATE, burst: int = SPAWN_BURST, max_children: int = MAX_CHILDREN):
+        if rate <= 0 or burst < 1 or max_children < 1:
+            raise ValueError("invalid spawn budget")
+        self.rate = float(rate)
+        self.burst = int(burst)
+        self._slots = BoundedSemaphore(max_children)
+        self._lock = Lock()
+        self._tokens = float(burst)
+        self._ts = time.monotonic()
+        self.spawns = 0
+        self.esperas = 0       # spawns que precisaram esperar
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def acquire(self, stop_event: Event | None = None) -> float | None:
+        # Retorna quanto esperou (s) ou None se o stop chegou antes
+        t0 = time.monotonic()
+        while not self._slots.acquire(timeout=0.1):
+            if stop_event is not None and stop_event.is_set():
+                return None
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._ts) * self.rate)
+                self._ts = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    break
+                falta = (1.0 - self._tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(falta):
+                    self._slots.release()
+                    return None
+            else:
+                time.sleep(falta)
+        espera = time.monotonic() - t0
+        with self._lock:
+            self.spawns += 1
+            if espera > 0.001:
+                self.esperas += 1
+                self.espera_total += espera
+                self.espera_max = max(self.espera_max, espera)
+        return espera
+
+    def release(self) -> None:
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "spawns": self.spawns,
+                "waited": self.esperas,
+                "wait_total_s": round(self.espera_total, 3),
+                "wait_max_s": round(self.espera_max, 3),
+            }
+
+
+SPAWN_BUDGET = SpawnBudget()
+
+# ---------- Timeout e coleta de filhos ----------
+# Cada chamada do CLI tem prazo; se travar, o filho é morto, a rodada segue e
+# a coleta do processo morto fica com o ChildReaper, fora do executor. O
+# executor checa o stop a cada CMD_POLL mesmo com um filho rodando.
+CMD_TIMEOUT = 15.0  # s por chamada do CLI
+CMD_POLL = 0.1
+
+class ChildReaper:
+    def __init__(self):
+        self._lock = Lock()
+        self._procs: List[subprocess.Popen] = []
+        self._thread: Thread | None = None
+        self.hung = 0            # mortos por timeout
+        self.killed_on_stop = 0  # mortos porque o stop chegou no meio do comando
+        self.reaped = 0
+
+    def kill(self, p: subprocess.Popen, hung: bool) -> None:
+        try:
+            p.kill()
+        except OSError:
+            pass
+        with self._lock:
+            if hung:
+                self.hung += 1
+            else:
+                self.killed_on_stop += 1
+            self._procs.append(p)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="reaper", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                vivos = [p for p in self._procs if p.poll() is None]
+                self.reaped += len(self._procs) - len(vivos)
+                self._procs = vivos
+                if not vivos:
+                    self._thread = None
+                    return
+            for p in vivos:
+                try:
+                    p.kill()
+                except OSError:
+                    pass
+            time.sleep(0.5)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hung": self.hung,
+                "killed_on_stop": self.killed_on_stop,
+                "reaped": self.reaped,
+                "reaping": len(self._procs),
+            }
+
+
+REAPER = ChildReaper()
+
+def _creationflags() -> int:
+    if os.name == "nt":
+        CREATE_NO_WINDOW = 0x08000000
+        BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+        return CREATE_NO_WINDOW | BELOW_NORMAL_PRIORITY_CLASS
+    return 0
+
+def _rodar_filho(cmd: Union[str, List[str]], timeout: float, stop_event: Event | None) -> int | None:
+    # dispatcher padrão do executor: um processo do CLI por comando
+    p = subprocess.Popen(cmd, shell=False, creationflags=_creationflags())
+    return _esperar_filho(p, time.monotonic() + timeout, stop_event)
+
+def _esperar_filho(p: subprocess.Popen, prazo: float, stop_event: Event | None) -> int | None:
+    # código de saída, ou None se o filho foi morto (timeout ou stop)
+    while True:
+        try:
+            return p.wait(timeout=CMD_POLL)
+        except subprocess.TimeoutExpired:
+            pass
+        if stop_event is not None and stop_event.is_set():
+            REAPER.kill(p, hung=False)
+            return None
+        if time.monotonic() >= prazo:
+            REAPER.kill(p, hung=True)
+            return None
 
 # ---------- Núcleo ----------
+@instrument("construir_script")
 def construir_script(
     exe_path: str,
     monitor: str,
@@ -51,6 +957,7 @@ def construir_script(
     aleatorio: bool = False,
     fade: bool = True,
     fadename: str = "opaimg",
+    control: PipelineControl | None = None,
 ) -> Iterator[Item]:
     if passo_fade <= 0:
         raise ValueError("passo_fade deve ser > 0")
@@ -86,62 +993,203 @@ def construir_script(
             fade_in_cmds.append(("cmd", prefix + raw_fade(Decimal("1.00"))))
 
     fixed: Dict[str, str] = {}
-    folders: Dict[str, List[str]] = {}
-    for k, p in props.items():
-        path = Path(p)
-        if path.is_dir():
-            imgs = list_images_cached(path, extensoes)
-            folders[k] = imgs
-        else:
-            if not path.exists():
+    state: Dict[str, _Rotacao | _RotacaoMulti] = {}
+    pastas: Dict[str, Path] = {}
+    multi: Dict[str, str] = {}
+    pendentes: Dict[str, Tuple] = {}  # pastas inacessíveis no início, sem listagem anterior
+    espera: Dict[str, _RotacaoMulti] = {}  # fontes múltiplas ainda sem nenhuma listagem
+
+    # Pastas em uso ficam fixadas no cache enquanto o pipeline existir. A
+    # chave é fixada antes da varredura: a listagem nova não pode ser
+    # despejada entre a inserção no cache e o pin.
+    fixadas: set = set()
+
+    def fixar_chave(ck: str) -> None:
+        if ck not in fixadas:
+            _DIR_CACHE.pin(ck)
+            fixadas.add(ck)
+
+    def fixar() -> None:
+        # acerta os pins com as pastas de fato em uso
+        novas = {_cache_key(p) for p in pastas.values()}
+        for k in multi:
+            novas.update((state.get(k) or espera[k]).chaves())
+        for ck in novas - fixadas:
+            _DIR_CACHE.pin(ck)
+        for ck in fixadas - novas:
+            _DIR_CACHE.unpin(ck)
+        fixadas.clear()
+        fixadas.update(novas)
+
+    # reload: revarredura numa thread própria, sem segurar o pipeline; pastas
+    # simples voltam pelo cache, fontes múltiplas por `recarregadas` junto com
+    # os pins provisórios que a thread tomou antes de varrer
+    recarregadas: Dict[str, Tuple[List[_ListingBase], List[str], List[Tuple]]] = {}
+    recarga: List[Thread] = []
+    trava = Lock()
+    encerrado = Event()
+
+    def recarregar() -> None:
+        if recarga and recarga[0].is_alive():
+            return
+
+        def run():
+            for k, path in pastas.items():
+                try:
+                    list_images_cached(path, extensoes, refresh=True)
+                except OSError as e:
+                    log.warning("reload failed", extra={"fields": {"key": k, "error": str(e)}})
+            for k, spec in multi.items():
+                provisorios: List[str] = []
+                pend: List[Tuple] = []
+
+                def fixar_provisorio(ck: str) -> None:
+                    _DIR_CACHE.pin(ck)
+                    provisorios.append(ck)
+
+                try:
+                    listas = listar_fontes(spec, extensoes, refresh=True, fixar=fixar_provisorio, pendentes=pend)
+                except OSError as e:
+                    listas = None
+                    log.warning("reload failed", extra={"fields": {"key": k, "error": str(e)}})
+                with trava:
+                    if listas is not None and not encerrado.is_set():
+                        recarregadas[k] = (listas, provisorios, pend)
+                        continue
+                for ck in provisorios:
+                    _DIR_CACHE.unpin(ck)
+
+        recarga[:] = [Thread(target=run, name="reload", daemon=True)]
+        recarga[0].start()
+
+    try:
+        for k, p in props.items():
+            path = Path(p)
+            if is_multi_source(p):
+                # fontes que estouraram o prazo ficam pendentes (fixadas) como
+                # uma pasta simples; sem nenhuma listagem, a prop espera
+                pend: List[Tuple] = []
+                try:
+                    rot = _RotacaoMulti(listar_fontes(p, extensoes, fixar=fixar_chave, pendentes=pend), aleatorio, pend)
+                except TimeoutError as e:
+                    # só padrões glob que não responderam: voltam num reload
+                    log.warning("sources unreachable, waiting for reload", extra={"fields": {"key": k, "error": str(e)}})
+                    rot = _RotacaoMulti([], aleatorio)
+                if rot.listas:
+                    state[k] = rot
+                else:
+                    espera[k] = rot
+                multi[k] = p
+                continue
+            fixar_chave(_cache_key(path))
+            tipo = _classificar(path)
+            if tipo == "dir":
+                try:
+                    state[k] = _Rotacao(list_images_cached(path, extensoes), aleatorio)
+                except TimeoutError:
+                    pendentes[k] = (_cache_key(path), _norm_exts(extensoes))
+                pastas[k] = path
+            elif tipo == "timeout":
+                pendentes[k] = (_cache_key(path), _norm_exts(extensoes))
+                _agendar_retry(pendentes[k][0], path)
+                pastas[k] = path
+            elif tipo == "file":
+                fixed[k] = str(path.as_posix())
+            else:
                 raise FileNotFoundError(f"File not found: {p}")
-            fixed[k] = str(path.as_posix())
+        for k in pendentes:
+            log.warning("folder unreachable, waiting for background scan", extra={"fields": {"key": k}})
 
-    if not fixed and not folders:
-        raise ValueError("Props do not contain any valid files or folders.")
+        if not fixed and not state and not pendentes and not espera:
+            raise ValueError("Props do not contain any valid files or folders.")
 
-    state = {}
-    for k, imgs in folders.items():
-        n = len(imgs)
-        if aleatorio:
-            ordem = list(range(n))
-            random.shuffle(ordem)
-        else:
-            ordem = sorted(range(n), key=lambda i: Path(imgs[i]).name.lower())
-        state[k] = {"imgs": imgs, "ordem": ordem, "i": 0, "n": n, "aleatorio": aleatorio}
+        fixar()  # solta as chaves que viraram arquivo ou fonte descartada
+        if control is not None:
+            control.ao_recarregar(recarregar)
 
-    while True:
-        for it in fade_out_cmds:
-            yield it
+        while True:
+            # listagens novas (reload ou retry em background) substituem as
+            # antigas antes do fade-out: a tela não fica apagada durante a troca
+            if recarregadas:
+                with trava:
+                    novas = dict(recarregadas)
+                    recarregadas.clear()
+                for k, (listas, _, pend) in novas.items():
+                    rot = state.get(k) or espera[k]
+                    if listas:
+                        rot.trocar(listas)
+                    rot.pendentes = pend
+                fixar()  # globs podem ter ganho ou perdido pastas
+                for _, provisorios, _ in novas.values():
+                    for ck in provisorios:
+                        _DIR_CACHE.unpin(ck)
 
-        rodada = dict(fixed)
-        for k, st in state.items():
-            idx = st["ordem"][st["i"]]
-            rodada[k] = st["imgs"][idx]
-            st["i"] += 1
-            if st["i"] >= st["n"]:
-                st["i"] = 0
-                if st["aleatorio"]:
-                    random.shuffle(st["ordem"])
+            # pastas que voltaram (retry em background) entram na rotação
+            for k, ck in list(pendentes.items()):
+                listing = _view_for(ck)
+                if listing is not None and len(listing):
+                    state[k] = _Rotacao(listing, aleatorio)
+                    del pendentes[k]
+            for k, rot in list(espera.items()):
+                rot.atualizar_do_cache()
+                if rot.listas:
+                    state[k] = espera.pop(k)
+            if not fixed and not state:
+                yield ("sleep", SCAN_RETRY)
+                continue
 
-        yield ("cmd", prefix + raw_props(rodada))
+            for rot in state.values():
+                rot.atualizar_do_cache()
 
-        for it in fade_in_cmds:
-            yield it
+            rodada = dict(fixed)
+            for k, rot in state.items():
+                rodada[k] = rot.proximo()
+            if control is not None:
+                control.publicar(
+                    {k: rodada[k] for k in state},
+                    {k: rot.espiar() for k, rot in state.items()},
+                )
 
-        if intervalo_segundos > 0:
+            for it in fade_out_cmds:
+                yield it
+
+            yield ("cmd", prefix + raw_props(rodada))
+
+            for it in fade_in_cmds:
+                yield it
+
+            # sleep 0 também é emitido: marca a fronteira da rodada (pause/next)
             yield ("sleep", float(intervalo_segundos))
+    finally:
+        if control is not None:
+            control.ao_recarregar(None)
+        with trava:
+            encerrado.set()
+            sobras = list(recarregadas.values())
+            recarregadas.clear()
+        for _, provisorios, _ in sobras:
+            for ck in provisorios:
+                _DIR_CACHE.unpin(ck)
+        for ck in fixadas:
+            _DIR_CACHE.unpin(ck)
 
 
-def executar_script(itens: Iterator[Item], stop_event: Event | None = None) -> None:
+def executar_script(
+    itens: Iterator[Item],
+    stop_event: Event | None = None,
+    trace: TraceRecorder | None = None,
+    monitor: str = "",
+    control: PipelineControl | None = None,
+    clock: Clock = SYSTEM_CLOCK,
+    budget: SpawnBudget | None = None,
+    cmd_timeout: float | None = None,
+    dispatcher=None,
+) -> None:
+    # dispatcher(cmd, timeout, stop_event) -> código de saída, ou None se o
+    # comando foi abandonado (timeout/stop); o soak injeta um em memória
+    cmd_timeout = CMD_TIMEOUT if cmd_timeout is None else float(cmd_timeout)
+    dispatcher = _rodar_filho if dispatcher is None else dispatcher
     try:
-        if os.name == "nt":
-            CREATE_NO_WINDOW = 0x08000000
-            BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
-            creationflags = CREATE_NO_WINDOW | BELOW_NORMAL_PRIORITY_CLASS
-        else:
-            creationflags = 0
-
         last_raw = None
         last_cmd = None
 
@@ -152,48 +1200,79 @@ def executar_script(itens: Iterator[Item], stop_event: Event | None = None) -> N
             if tipo == "cmd":
                 rcode = 0
                 if isinstance(valor, tuple) and len(valor) >= 4 and valor[0] == "__raw__":
-                    _, exe_path, monitor, raw = valor[:4]
+                    _, exe_path, monitor_raw, raw = valor[:4]
                     if raw == last_raw:
                         continue
                     last_raw = raw
-                    args = [
+                    cmd = [
                         exe_path, "-control", "applyProperties",
-                        "-monitor", str(monitor),
+                        "-monitor", str(monitor_raw),
                         "-properties", raw
                     ]
-                    r = subprocess.run(args, shell=False, creationflags=creationflags)
-                    rcode = r.returncode
                 else:
                     if valor == last_cmd:
                         continue
                     last_cmd = valor
-                    if isinstance(valor, list):
-                        r = subprocess.run(valor, shell=False, creationflags=creationflags)
-                    else:
-                        r = subprocess.run(str(valor), shell=False, creationflags=creationflags)
-                    rcode = r.returncode
+                    cmd = valor if isinstance(valor, list) else str(valor)
+
+                espera = 0.0
+                if budget is not None:
+                    espera = budget.acquire(stop_event)
+                    if espera is None:
+                        break
+                t0 = time.monotonic()
+                try:
+                    rcode = dispatcher(cmd, cmd_timeout, stop_event)
+                finally:
+                    if budget is not None:
+                        budget.release()
+                # por comando: uma sessão aberta no meio da execução já enxerga o executor
+                record_hook("executar_script.cmd", time.monotonic() - t0)
+                if espera:
+                    record_hook("spawn_budget.wait", espera)
 
-                if rcode != 0:
-                    print("Comando falhou com código:", rcode)
+                if trace is not None:
+                    trace.record(monitor, split_exe(valor)[1], t0, time.monotonic() - t0, rcode, espera)
+                if rcode is None:
+                    if stop_event is not None and stop_event.is_set():
+                        break
+                    # pode não ter sido aplicado: a mesma propriedade é reenviada na próxima vez
+                    last_raw = last_cmd = None
+                    log.warning("command timed out, skipped",
+                                extra={"fields": {"monitor": monitor, "timeout_s": cmd_timeout}})
+                elif rcode != 0:
+                    log.warning("command failed", extra={"fields": {"monitor": monitor, "rc": rcode}})
 
             elif tipo == "sleep":
                 timeout = float(valor)
-                if stop_event:
-                    if stop_event.wait(timeout):
+                if control is not None:
+                    if control.sleep(timeout, stop_event, clock):
                         return
-                else:
-                    time.sleep(timeout)
+                elif clock.wait(stop_event, timeout):
+                    return
             else:
                 raise ValueError(f"Item inválido: {tipo}")
 
-    except Exception as e:
-        print("Falha no executor:", repr(e))
+    except Exception:
+        log.exception("executor failed", extra={"fields": {"monitor": monitor}})
 
 
-def executar_multimonitor_com_stop(configs: List[dict], stop: Event) -> None:
+def executar_multimonitor_com_stop(
+    configs: List[dict],
+    stop: Event,
+    trace: TraceRecorder | None = None,
+    controls: Dict[str, PipelineControl] | None = None,
+    clock: Clock = SYSTEM_CLOCK,
+    budget: SpawnBudget | None = None,
+    stagger_segundos: float = STAGGER_SEGUNDOS,
+    dispatcher=None,
+) -> None:
     threads: List[Thread] = []
+    controls = {} if controls is None else controls
+    budget = SPAWN_BUDGET if budget is None else budget
     try:
-        for cfg in configs:
+        for idx, cfg in enumerate(configs):
+            ctl = controls.setdefault(str(cfg["monitor"]), PipelineControl())
             seq = construir_script(
                 exe_path=cfg["exe_path"],
                 monitor=cfg["monitor"],
@@ -204,19 +1283,42 @@ def executar_multimonitor_com_stop(configs: List[dict], stop: Event) -> None:
                 aleatorio=bool(cfg.get("aleatorio", False)),
                 fade=bool(cfg.get("fade", True)),
                 fadename=str(cfg.get("fadename", "opaimg")),
+                control=ctl,
+            )
+            # defasagem inicial: evita que todos os monitores façam fade juntos
+            offset = cfg.get("offset_segundos")
+            offset = idx * stagger_segundos if offset is None else max(0.0, float(offset))
+            if offset > 0:
+                seq = itertools.chain([("sleep", offset)], seq)
+            t = Thread(
+                target=executar_script,
+                args=(seq, stop, trace, str(cfg["monitor"]), ctl, clock, budget),
+                kwargs={"cmd_timeout": cfg.get("cmd_timeout_segundos"), "dispatcher": dispatcher},
+                daemon=True,
             )
-            t = Thread(target=executar_script, args=(seq, stop), daemon=True)
             t.start()
             threads.append(t)
 
-        while any(t.is_alive() for t in threads) and not stop.is_set():
-            time.sleep(0.25)
-    except Exception as e:
-        print("Erro na orquestração:", repr(e))
+        # só vigia as threads (tempo real); as esperas simuladas dos
+        # pipelines, inclusive a defasagem inicial, passam pelo clock
+        while any(t.is_alive() for t in threads) and not stop.wait(0.25):
+            pass
+    except Exception:
+        log.exception("orchestration failed")
     finally:
         stop.set()
+        for ctl in controls.values():
+            ctl.interrupt()
+        # prazo único para todos: o stop não pode esperar 1,5 s por monitor
+        prazo = time.monotonic() + 1.5
         for t in threads:
-            t.join(timeout=1.5)
+            t.join(timeout=max(0.0, prazo - time.monotonic()))
+        vivos = sum(t.is_alive() for t in threads)
+        if vivos:
+            log.warning("executor threads still running after stop", extra={"fields": {"threads": vivos}})
+        log.info("spawn budget", extra={"fields": budget.stats()})
+        log.info("listing cache", extra={"fields": _DIR_CACHE.stats()})
+        log.info("child processes", extra={"fields": REAPER.stats()})
 
 # ---------- Utilidades de parsing ----------
 def parse_props_text(text: str) -> Dict[str, str]:
@@ -234,6 +1336,42 @@ def parse_props_text(text: str) -> Dict[str, str]:
 def props_to_text(props: Dict[str, str]) -> str:
     return "\n".join(f"{k}={v}" for k, v in props.items())
 
+# ---------- Pré-varredura (GUI) ----------
+# Valida cada prop e aquece o _DIR_CACHE; retorna key -> (qtd, mensagem).
+# qtd < 0 indica erro e a mensagem diz o motivo.
+def scan_props(props: Dict[str, str], extensoes: Tuple[str, ...]) -> Dict[str, Tuple[int, str]]:
+    res: Dict[str, Tuple[int, str]] = {}
+    for k, p in props.items():
+        path = Path(p)
+        try:
+            if is_multi_source(p):
+                pend: List[Tuple] = []
+                listas = listar_fontes(p, extensoes, pendentes=pend)
+                n = sum(len(l) for l in listas)
+                msg = f"{n} files in {len(listas)} sources"
+                if pend:
+                    msg += f", {len(pend)} unreachable (retried on Start)"
+                res[k] = (n, msg)
+                continue
+            tipo = _classificar(path)
+            if tipo == "dir":
+                n = len(list_images_cached(path, extensoes))
+                res[k] = (n, f"{n} files")
+            elif tipo == "timeout":
+                # sem pipeline a pasta não fica fixada e nada revarre em
+                # background: o Start espera por ela e tenta de novo
+                res[k] = (0, "unreachable, retried on Start")
+            elif tipo == "file":
+                res[k] = (1, "file")
+            else:
+                res[k] = (-1, "not found")
+        except TimeoutError:
+            # sem listagem anterior; não bloqueia o Start, o pipeline espera a pasta
+            res[k] = (0, "scan timed out, retried on Start")
+        except (OSError, ValueError) as e:
+            res[k] = (-1, str(e))
+    return res
+
 # ---------- Verificação do Wallpaper Engine ----------
 _WE_NAMES = {"wallpaper32.exe", "wallpaper64.exe"}
 _WE_CACHE = {"ts": 0.0, "ok": True}
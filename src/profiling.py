@@ -0,0 +1,228 @@
+from __future__ import annotations
+import os
+import sys
+import time
+import inspect
+import tracemalloc
+from functools import wraps
+from pathlib import Path
+from threading import Thread, Event, Lock, get_ident
+from typing import Callable, Dict, List, Tuple
+
+from .applog import get_logger
+
+# Janela de profiling em segundos ao iniciar (ex.: RANDOM_IMAGES_PROFILE=120)
+PROFILE_ENV = "RANDOM_IMAGES_PROFILE"
+PROFILE_DIR = "profiles"
+SAMPLE_INTERVAL = 0.01  # segundos entre amostras de pilha
+TOP_STACKS = 200
+TOP_ALLOCS = 25
+
+log = get_logger(__name__)
+
+_SESSION: ProfileSession | None = None
+_SESSION_LOCK = Lock()
+
+
+# ---------- Sessão ----------
+# Amostragem de pilhas de todas as threads (sys._current_frames) + snapshots
+# do tracemalloc no início e no fim da janela. Sem sessão ativa nada roda.
+class ProfileSession:
+    def __init__(self, duration: float, out_dir: Path, on_done: Callable[[Path], None] | None):
+        self.duration = float(duration)
+        self.out_dir = out_dir
+        self.on_done = on_done
+        self.started = time.time()
+        self._stop = Event()
+        self._lock = Lock()
+        self._stacks: Dict[str, int] = {}
+        self._hooks: Dict[str, List[float]] = {}  # nome -> [chamadas, tempo total, máx]
+        self._samples = 0
+        self._own_tracemalloc = not tracemalloc.is_tracing()
+        if self._own_tracemalloc:
+            tracemalloc.start()
+        self._snap0 = tracemalloc.take_snapshot()
+        self._thread = Thread(target=self._run, name="profiler", daemon=True)
+
+    def add(self, name: str, dt: float) -> None:
+        with self._lock:
+            h = self._hooks.setdefault(name, [0, 0.0, 0.0])
+            h[0] += 1
+            h[1] += dt
+            if dt > h[2]:
+                h[2] = dt
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _sample(self, names: Dict[int, str], me: int) -> None:
+        for tid, frame in sys._current_frames().items():
+            if tid == me:
+                continue
+            parts: List[str] = []
+            f = frame
+            while f is not None:
+                co = f.f_code
+                parts.append(f"{Path(co.co_filename).name}:{co.co_name}")
+                f = f.f_back
+            parts.append(names.get(tid, str(tid)))
+            key = ";".join(reversed(parts))
+            self._stacks[key] = self._stacks.get(key, 0) + 1
+        self._samples += 1
+
+    def _run(self) -> None:
+        import threading
+        me = get_ident()
+        fim = time.monotonic() + self.duration
+        while not self._stop.is_set() and time.monotonic() < fim:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            try:
+                self._sample(names, me)
+            except Exception:
+                pass
+            self._stop.wait(SAMPLE_INTERVAL)
+        path = None
+        try:
+            path = self._write()
+        except Exception:
+            log.exception("cannot write profile")
+        finally:
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+            _clear_session(self)
+        if path is not None and self.on_done:
+            try:
+                self.on_done(path)
+            except Exception:
+                pass
+
+    def _write(self) -> Path:
+        snap1 = tracemalloc.take_snapshot()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        path = self.out_dir / f"profile-{stamp}.txt"
+        cur, peak = tracemalloc.get_traced_memory()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# profile {stamp}  window={time.time() - self.started:.1f}s  samples={self._samples}\n")
+            f.write(f"# tracemalloc current={cur / 1024:.0f} KiB peak={peak / 1024:.0f} KiB\n\n")
+
+            f.write("## hooks (name calls total_s max_s)\n")
+            with self._lock:
+                hooks = sorted(self._hooks.items(), key=lambda kv: -kv[1][1])
+            for name, (n, tot, mx) in hooks:
+                f.write(f"{name} {int(n)} {tot:.6f} {mx:.6f}\n")
+
+            f.write(f"\n## top allocation deltas (top {TOP_ALLOCS})\n")
+            for st in snap1.compare_to(self._snap0, "lineno")[:TOP_ALLOCS]:
+                f.write(f"{st}\n")
+
+            f.write(f"\n## stacks (collapsed, top {TOP_STACKS})\n")
+            top: List[Tuple[str, int]] = sorted(self._stacks.items(), key=lambda kv: -kv[1])
+            for key, n in top[:TOP_STACKS]:
+                f.write(f"{key} {n}\n")
+        return path
+
+
+def _clear_session(s: ProfileSession) -> None:
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is s:
+            _SESSION = None
+
+
+# ---------- API ----------
+def is_active() -> bool:
+    return _SESSION is not None
+
+
+def start_session(
+    duration: float,
+    out_dir: str | Path = PROFILE_DIR,
+    on_done: Callable[[Path], None] | None = None,
+) -> bool:
+    global _SESSION
+    if duration <= 0:
+        raise ValueError("duration must be > 0")
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            return False
+        _SESSION = ProfileSession(duration, Path(out_dir), on_done)
+        _SESSION._thread.start()
+    return True
+
+
+def stop_session() -> None:
+    s = _SESSION
+    if s is not None:
+        s.stop()
+
+
+def start_from_env(on_done: Callable[[Path], None] | None = None) -> bool:
+    raw = os.environ.get(PROFILE_ENV, "").strip()
+    if not raw:
+        return False
+    try:
+        duration = float(raw)
+    except ValueError:
+        duration = 0.0
+    if not duration > 0:
+        # variável de diagnóstico inválida não pode derrubar o app no início
+        log.warning("invalid profile window", extra={"fields": {PROFILE_ENV: raw}})
+        return False
+    return start_session(duration, on_done=on_done)
+
+
+# ---------- Hooks ----------
+# Sem sessão ativa o custo é uma leitura de global por chamada (ou por item,
+# nos geradores). A sessão é consultada a cada item, então pipelines que já
+# estavam rodando entram numa sessão iniciada depois pelo tray.
+def record_hook(name: str, dt: float) -> None:
+    # para laços longos que medem cada iteração (ex.: cada comando do executor)
+    s = _SESSION
+    if s is not None:
+        s.add(name, dt)
+
+
+def _iter_medido(name: str, it):
+    try:
+        while True:
+            s = _SESSION
+            if s is None:
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            else:
+                t0 = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    s.add(name, time.perf_counter() - t0)
+            yield item
+    finally:
+        # close() do embrulho chega ao gerador original (libera pins etc.)
+        it.close()
+
+
+def instrument(name: str):
+    def deco(fn):
+        if inspect.isgeneratorfunction(fn):
+            @wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                return _iter_medido(name, fn(*args, **kwargs))
+            return gen_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            s = _SESSION
+            if s is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                s.add(name, time.perf_counter() - t0)
+        return wrapper
+    return deco
@@ -0,0 +1,164 @@
+from __future__ import annotations
+import os
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Set, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, QStandardPaths, Signal
+from PySide6.QtGui import QImage, QImageReader
+
+from .applog import get_logger
+
+# Miniaturas geradas fora da thread da UI. Memória: LRU por caminho, cada
+# entrada com o (mtime, tamanho) de quando foi gerada; um acerto volta na hora
+# e a assinatura é conferida no pool (stat pode travar num NAS), que gera de
+# novo se o arquivo foi trocado. Disco: PNG por (caminho, mtime, tamanho), LRU
+# pelo mtime do arquivo de cache.
+THUMB_SIZE = QSize(192, 108)
+MEM_MAX_ITEMS = 64
+DISK_MAX_BYTES = 64 * 1024 * 1024
+TRIM_EVERY = 32  # gravações entre verificações do limite em disco
+POOL_THREADS = 2
+
+log = get_logger(__name__)
+
+
+def default_cache_dir() -> Path:
+    base = QStandardPaths.writableLocation(QStandardPaths.CacheLocation) or QStandardPaths.writableLocation(
+        QStandardPaths.TempLocation
+    )
+    return Path(base) / "random_images_thumbs"
+
+
+Sig = Tuple[int, int]  # (mtime_ns, tamanho)
+
+
+def _sig(path: str) -> Sig | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _ThumbJob(QRunnable):
+    def __init__(self, loader: ThumbnailLoader, path: str, sig: Sig | None = None):
+        super().__init__()
+        self.loader = loader
+        self.path = path
+        self.sig = sig  # assinatura da entrada em memória a conferir (None = gerar)
+
+    def run(self):
+        sig = _sig(self.path)
+        if self.sig is not None and sig == self.sig:
+            self.loader._unchanged(self.path)
+            return
+        try:
+            img = self.loader._produce(self.path, sig)
+        except Exception as e:
+            log.warning("thumbnail failed", extra={"fields": {"path": self.path, "error": repr(e)}})
+            img = QImage()
+        self.loader._finish(self.path, sig, img)
+
+
+class ThumbnailLoader(QObject):
+    # (caminho, miniatura); imagem nula = não decodificável (vídeo, arquivo sumiu)
+    ready = Signal(str, QImage)
+
+    def __init__(self, cache_dir: Path | None = None, parent: QObject | None = None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(POOL_THREADS)
+        self._lock = Lock()
+        self._mem: OrderedDict[str, Tuple[Sig | None, QImage]] = OrderedDict()
+        self._pending: Set[str] = set()
+        self._writes = 0
+
+    def request(self, path: str) -> QImage | None:
+        # Acerto em memória volta na hora (e é conferido em background); senão
+        # agenda e responde via `ready`. Arquivo trocado também chega via `ready`.
+        with self._lock:
+            hit = self._mem.get(path)
+            if hit is not None:
+                self._mem.move_to_end(path)
+            if path in self._pending:
+                return hit[1] if hit is not None else None
+            self._pending.add(path)
+        self.pool.start(_ThumbJob(self, path, hit[0] if hit is not None else None))
+        return hit[1] if hit is not None else None
+
+    def _unchanged(self, path: str) -> None:
+        with self._lock:
+            self._pending.discard(path)
+
+    def _finish(self, path: str, sig: Sig | None, img: QImage) -> None:
+        with self._lock:
+            self._pending.discard(path)
+            self._mem[path] = (sig, img)
+            self._mem.move_to_end(path)
+            while len(self._mem) > MEM_MAX_ITEMS:
+                self._mem.popitem(last=False)
+        self.ready.emit(path, img)
+
+    # ---------- thread do pool ----------
+    def _disk_file(self, path: str, sig: Sig) -> Path:
+        raw = f"{path}|{sig[0]}|{sig[1]}|{THUMB_SIZE.width()}x{THUMB_SIZE.height()}"
+        return self.cache_dir / (hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest() + ".png")
+
+    def _produce(self, path: str, sig: Sig | None) -> QImage:
+        if sig is None:
+            return QImage()
+        f = self._disk_file(path, sig)
+        if f.exists():
+            img = QImage(str(f))
+            if not img.isNull():
+                try:
+                    os.utime(f)
+                except OSError:
+                    pass
+                return img
+
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid():
+            reader.setScaledSize(size.scaled(THUMB_SIZE, Qt.KeepAspectRatio))
+        img = reader.read()
+        if img.isNull():
+            return QImage()
+        if img.width() > THUMB_SIZE.width() or img.height() > THUMB_SIZE.height():
+            img = img.scaled(THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            img.save(str(f), "PNG")
+        except OSError:
+            return img
+        with self._lock:
+            self._writes += 1
+            trim = self._writes % TRIM_EVERY == 0
+        if trim:
+            self._trim_disk()
+        return img
+
+    def _trim_disk(self) -> None:
+        try:
+            files = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(self.cache_dir)
+                     if e.is_file() and e.name.endswith(".png")]
+        except OSError:
+            return
+        total = sum(s for _, s, _ in files)
+        if total <= DISK_MAX_BYTES:
+            return
+        files.sort()
+        for _, s, p in files:
+            try:
+                os.remove(p)
+                total -= s
+            except OSError:
+                pass
+            if total <= DISK_MAX_BYTES * 0.8:
+                break
@@ -0,0 +1,208 @@
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from threading import Thread, Event, Lock
+from typing import Dict, List, Iterator, Tuple, Union
+
+from .applog import get_logger
+
+# Variável de ambiente que liga a gravação em produção (caminho do arquivo)
+TRACE_ENV = "RANDOM_IMAGES_TRACE"
+FAKE_CLI = Path(__file__).resolve().parent.parent / "tools" / "fake_we_cli.py"
+
+log = get_logger(__name__)
+
+Args = Union[str, List[str]]
+
+# ---------- Gravação ----------
+# Arquivo aberto em append; cada TraceRecorder (uma execução do app) começa
+# com um cabeçalho de sessão e depois grava uma linha JSON por comando:
+#   {"session": hora local de início, "pid": processo}
+#   {"t": s desde o início da sessão, "m": monitor, "a": argumentos sem o exe,
+#    "d": latência em s, "rc": código de retorno (null = morto por timeout/stop), "w": espera pelo orçamento (se houve)}
+class TraceRecorder:
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = Lock()
+        self._f = open(self.path, "a", encoding="utf-8")
+        self._t0 = time.monotonic()
+        cab = {"session": time.strftime("%Y-%m-%dT%H:%M:%S"), "pid": os.getpid()}
+        self._f.write(json.dumps(cab, separators=(",", ":")) + "\n")
+        self._f.flush()
+
+    def record(self, monitor: str, args: Args, t: float, latency: float, rc: int | None, wait: float = 0.0) -> None:
+        # t é time.monotonic() do disparo; gravado relativo ao início da sessão
+        rec = {"t": round(t - self._t0, 6), "m": str(monitor), "a": args, "d": round(latency, 6), "rc": rc}
+        if wait > 0.001:
+            rec["w"] = round(wait, 6)
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.write(line + "\n")
+            self._f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+
+def open_trace_from_env() -> TraceRecorder | None:
+    path = os.environ.get(TRACE_ENV, "").strip()
+    if not path:
+        return None
+    try:
+        return TraceRecorder(path)
+    except OSError as e:
+        log.error("cannot open trace", extra={"fields": {"path": path, "error": repr(e)}})
+        return None
+
+
+def split_exe(cmd: Union[str, List[str], tuple]) -> tuple[str, Args]:
+    # Separa o executável dos argumentos nos formatos aceitos por executar_script
+    if isinstance(cmd, tuple):
+        _, exe_path, monitor, raw = cmd[:4]
+        return exe_path, ["-control", "applyProperties", "-monitor", str(monitor), "-properties", raw]
+    if isinstance(cmd, list):
+        return cmd[0], list(cmd[1:])
+    cmd = str(cmd)
+    if cmd.startswith('"'):
+        end = cmd.find('"', 1)
+        if end > 0:
+            return cmd[1:end], cmd[end + 1:].lstrip()
+    exe, _, rest = cmd.partition(" ")
+    return exe, rest
+
+
+# ---------- Leitura / replay ----------
+def read_trace(path: Union[str, Path]) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # última linha truncada (processo morto no meio da escrita)
+                continue
+
+
+def read_sessions(path: Union[str, Path]) -> List[Tuple[dict, List[dict]]]:
+    # (cabeçalho, comandos) por execução do app; linhas antes do primeiro
+    # cabeçalho (traces antigos) formam uma sessão sem cabeçalho
+    sessoes: List[Tuple[dict, List[dict]]] = []
+    for rec in read_trace(path):
+        if "session" in rec:
+            sessoes.append((rec, []))
+        elif "t" in rec:
+            if not sessoes:
+                sessoes.append(({}, []))
+            sessoes[-1][1].append(rec)
+    return [(cab, recs) for cab, recs in sessoes if recs]
+
+
+def to_argv(cli: List[str], args: Args) -> List[str]:
+    if isinstance(args, list):
+        return cli + args
+    # "-control applyProperties -monitor N -properties RAW~(...)~END":
+    # o último argumento pode conter espaços (caminhos), então só 5 cortes
+    return cli + args.split(None, 5)
+
+
+def _stats(vals: List[float]) -> dict:
+    if not vals:
+        return {"n": 0}
+    s = sorted(vals)
+    return {
+        "n": len(s),
+        "mean": sum(s) / len(s),
+        "p95": s[min(len(s) - 1, int(len(s) * 0.95))],
+        "max": s[-1],
+    }
+
+
+def replay_trace(
+    path: Union[str, Path],
+    cli: List[str] | None = None,
+    speed: float | None = 1.0,
+    stop_event: Event | None = None,
+) -> List[dict]:
+    # Cada sessão é reproduzida separadamente, uma após a outra: o relógio de
+    # sessões diferentes não é comparável (reinício do app ou do Windows).
+    stop = stop_event or Event()
+    out: List[dict] = []
+    for cab, recs in read_sessions(path):
+        if stop.is_set():
+            break
+        res = _replay_sessao(recs, cli or [sys.executable, str(FAKE_CLI)], speed, stop)
+        out.append({"session": cab.get("session"), "pid": cab.get("pid"), "monitors": res})
+    return out
+
+
+def _replay_sessao(recs_sessao: List[dict], cli: List[str], speed: float | None, stop: Event) -> Dict[str, dict]:
+    # speed=None -> o mais rápido possível; senão respeita os tempos gravados / speed
+    por_monitor: Dict[str, List[dict]] = {}
+    for rec in recs_sessao:
+        por_monitor.setdefault(str(rec.get("m", "")), []).append(rec)
+
+    t0_trace = min(recs[0]["t"] for recs in por_monitor.values())
+    creationflags = 0x08000000 if os.name == "nt" else 0
+    resultados: Dict[str, dict] = {}
+    t0 = time.monotonic()
+
+    def run(monitor: str, recs: List[dict]):
+        lat_orig: List[float] = []
+        lat_replay: List[float] = []
+        atrasos: List[float] = []
+        falhas = 0
+        for rec in recs:
+            if stop.is_set():
+                break
+            if speed:
+                alvo = t0 + (rec["t"] - t0_trace) / speed
+                espera = alvo - time.monotonic()
+                if espera > 0 and stop.wait(espera):
+                    break
+                atrasos.append(max(0.0, time.monotonic() - alvo))
+            ts = time.monotonic()
+            r = subprocess.run(to_argv(cli, rec["a"]), shell=False, creationflags=creationflags)
+            lat_replay.append(time.monotonic() - ts)
+            lat_orig.append(float(rec.get("d", 0.0)))
+            if r.returncode != 0:
+                falhas += 1
+        resultados[monitor] = {
+            "original": _stats(lat_orig),
+            "replay": _stats(lat_replay),
+            "drift": _stats(atrasos),
+            "failures": falhas,
+        }
+
+    threads = [Thread(target=run, args=(m, recs), daemon=True) for m, recs in por_monitor.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultados
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Replay a command trace against the fake CLI.")
+    ap.add_argument("trace")
+    ap.add_argument("--fast", action="store_true", help="ignore recorded timing")
+    ap.add_argument("--speed", type=float, default=1.0, help="time scale (2.0 = twice as fast)")
+    ap.add_argument("--cli", nargs="+", help="command used instead of the fake CLI")
+    ns = ap.parse_args(argv)
+    res = replay_trace(ns.trace, cli=ns.cli, speed=None if ns.fast else ns.speed)
+    print(json.dumps(res, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,120 @@
+import logging
 from pathlib import Path
-from typing import Dict, List
+from threading import Thread
+from typing import Dict, List, Tuple
 
 from PySide6.QtCore import Qt, QEvent, QTimer, QByteArray, Signal
-from PySide6.QtGui import QIcon, QPainter, QPixmap
+from PySide6.QtGui import QIcon, QImage, QPainter, QPixmap
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QLineEdit, QPushButton, QCheckBox, QSpinBox, QDoubleSpinBox, QPlainTextEdit,
     QFileDialog, QMessageBox, QTabWidget, QLabel, QSystemTrayIcon, QMenu, QStyle,
-    QDialog, QDialogButtonBox
+    QDialog, QDialogButtonBox, QComboBox, QGridLayout
 )
 
-from .model import APP_NAME, VERSION, APP_ICON_FILE, WEBSITE, parse_props_text, props_to_text
+from .applog import ring, format_entry, level
+from .thumbs import ThumbnailLoader, THUMB_SIZE
+from .model import (
+    APP_NAME, VERSION, APP_ICON_FILE, WEBSITE, CMD_TIMEOUT, parse_props_text, props_to_text, scan_props,
+)
 
 DEFAULT_EXTS = ".png,.jpg,.jpeg,.gif,.mp4"
 CONFIG_FILE = "config_wallpaper.json"
+SCAN_DEBOUNCE_MS = 600  # espera após a última tecla antes de varrer as pastas
+OFFSET_AUTO = -0.5  # mínimo do campo de defasagem = "Auto"; um passo acima já é 0
+
+# Imagem atual e próxima de cada key; miniaturas vêm prontas do ThumbnailLoader
+class PreviewPanel(QWidget):
+    def __init__(self, thumbs: ThumbnailLoader | None):
+        super().__init__()
+        self.thumbs = thumbs
+        self.grid = QGridLayout(self)
+        self.grid.setContentsMargins(0, 0, 0, 0)
+        self._keys: List[str] = []
+        self._labels: Dict[str, Tuple[QLabel, QLabel]] = {}
+        self._paths: Dict[QLabel, str] = {}
+        if thumbs is not None:
+            thumbs.ready.connect(self._on_ready)
+
+    def _thumb_label(self) -> QLabel:
+        lbl = QLabel()
+        lbl.setFixedSize(THUMB_SIZE)
+        lbl.setAlignment(Qt.AlignCenter)
+        lbl.setWordWrap(True)
+        lbl.setStyleSheet("QLabel { border: 1px solid palette(mid); }")
+        return lbl
+
+    def _rebuild(self, keys: List[str]):
+        while self.grid.count():
+            w = self.grid.takeAt(0).widget()
+            if w is not None:
+                w.deleteLater()
+        self._labels.clear()
+        self._paths.clear()
+        self._keys = keys
+        if not keys:
+            return
+        self.grid.addWidget(QLabel("Now"), 0, 1)
+        self.grid.addWidget(QLabel("Next"), 0, 2)
+        for row, k in enumerate(keys, start=1):
+            cur, nxt = self._thumb_label(), self._thumb_label()
+            self.grid.addWidget(QLabel(k), row, 0)
+            self.grid.addWidget(cur, row, 1)
+            self.grid.addWidget(nxt, row, 2)
+            self._labels[k] = (cur, nxt)
+
+    def set_images(self, atual: Dict[str, str], proximas: Dict[str, str]):
+        keys = list(atual)
+        if keys != self._keys:
+            self._rebuild(keys)
+        for k, (cur, nxt) in self._labels.items():
+            self._show(cur, atual.get(k))
+            self._show(nxt, proximas.get(k))
+
+    def clear(self):
+        self._rebuild([])
+
+    def _show(self, lbl: QLabel, path: str | None):
+        if not path:
+            lbl.clear()
+            self._paths.pop(lbl, None)
+            return
+        if self._paths.get(lbl) == path:
+            return
+        self._paths[lbl] = path
+        lbl.setToolTip(path)
+        img = self.thumbs.request(path) if self.thumbs is not None else None
+        if img is not None:
+            self._apply(lbl, path, img)
+        else:
+            lbl.setPixmap(QPixmap())
+            lbl.setText(Path(path).name)
+
+    def _on_ready(self, path: str, img: QImage):
+        for lbl, p in list(self._paths.items()):
+            if p == path:
+                self._apply(lbl, path, img)
+
+    def _apply(self, lbl: QLabel, path: str, img: QImage):
+        if img.isNull():
+            lbl.setPixmap(QPixmap())
+            lbl.setText(Path(path).name)
+        else:
+            lbl.setPixmap(QPixmap.fromImage(img))
+
 
 class MonitorTab(QWidget):
-    def __init__(self, idx: int):
+    # (geração, resultados) emitido pela thread de varredura
+    scanFinished = Signal(int, object)
+
+    def __init__(self, idx: int, thumbs: ThumbnailLoader | None = None):
         super().__init__()
         self.idx = idx
+        self.thumbs = thumbs
+        self._scan_gen = 0
+        self._scan_running = False
+        self._scan_pending = False
+        self.scan_results: Dict[str, Tuple[int, str]] | None = None
         self._build_ui()
 
     def _build_ui(self):
@@ -46,6 +142,21 @@ class MonitorTab(QWidget):
         self.passo_fade.setDecimals(2)
         self.passo_fade.setValue(0.20)
 
+        # defasagem do primeiro fade; "Auto" = posição da aba × STAGGER_SEGUNDOS
+        self.offset = QDoubleSpinBox()
+        self.offset.setRange(OFFSET_AUTO, 3600.0)
+        self.offset.setDecimals(1)
+        self.offset.setSingleStep(0.5)
+        self.offset.setSpecialValueText("Auto")
+        self.offset.setValue(OFFSET_AUTO)
+        self.offset.valueChanged.connect(self._snap_offset)
+
+        # prazo de cada chamada do CLI; travou, o processo é morto e a rodada segue
+        self.cmd_timeout = QDoubleSpinBox()
+        self.cmd_timeout.setRange(1.0, 300.0)
+        self.cmd_timeout.setDecimals(1)
+        self.cmd_timeout.setValue(CMD_TIMEOUT)
+
         self.aleatorio_chk = QCheckBox("Shuffle images")
         self.aleatorio_chk.setChecked(True)
 
@@ -57,6 +168,8 @@ class MonitorTab(QWidget):
         form.addRow("Wallpaper Engine executable:", self._h(exeh))
         form.addRow("Monitor:", self.monitor_edit)
         form.addRow("Interval (s):", self.intervalo)
+        form.addRow("Start offset (s):", self.offset)
+        form.addRow("Command timeout (s):", self.cmd_timeout)
         form.addRow("", self.fade_chk)
         form.addRow("Fade name:", self.fadename)
         form.addRow("Fade step:", self.passo_fade)
@@ -64,15 +177,37 @@ class MonitorTab(QWidget):
         form.addRow("Extensions:", self.exts_edit)
         form.addRow(QLabel("Props (key=path, 1 per line):"), self.props_edit)
 
+        self.scan_lbl = QLabel("")
+        self.scan_lbl.setWordWrap(True)
+        self.scan_lbl.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        form.addRow("Folders:", self.scan_lbl)
+
+        self.preview = PreviewPanel(self.thumbs)
+        form.addRow("Preview:", self.preview)
+
         layout.addLayout(form)
         layout.addStretch()
 
         self.fade_chk.toggled.connect(self._toggle_fade_fields)
         self._toggle_fade_fields(self.fade_chk.isChecked())
 
+        # pré-varredura com debounce
+        self._scan_timer = QTimer(self)
+        self._scan_timer.setSingleShot(True)
+        self._scan_timer.setInterval(SCAN_DEBOUNCE_MS)
+        self._scan_timer.timeout.connect(self._start_scan)
+        self.props_edit.textChanged.connect(self._schedule_scan)
+        self.exts_edit.textChanged.connect(self._schedule_scan)
+        self.scanFinished.connect(self._on_scan_finished)
+
     def _h(self, lay):
         w = QWidget(); w.setLayout(lay); return w
 
+    def _snap_offset(self, v: float):
+        # negativo digitado (ex.: -0.3) vale "Auto": mostra como tal
+        if OFFSET_AUTO < v < 0:
+            self.offset.setValue(OFFSET_AUTO)
+
     def _toggle_fade_fields(self, checked: bool):
         self.fadename.setEnabled(checked)
         self.passo_fade.setEnabled(checked)
@@ -82,6 +217,50 @@ class MonitorTab(QWidget):
         if path:
             self.exe_edit.setText(path)
 
+    # ---------- pré-varredura ----------
+    def _schedule_scan(self, *_):
+        self._scan_gen += 1
+        self.scan_results = None
+        self._scan_timer.start()
+
+    def _start_scan(self):
+        if self._scan_running:
+            self._scan_pending = True
+            return
+        cfg = self.to_dict()
+        props, exts, gen = cfg["props"], tuple(cfg["extensoes"]), self._scan_gen
+        if not props:
+            self.scan_lbl.setText("")
+            return
+        self._scan_running = True
+        self.scan_lbl.setText("Scanning...")
+
+        def run():
+            try:
+                res = scan_props(props, exts)
+            except Exception as e:
+                res = {"": (-1, repr(e))}
+            self.scanFinished.emit(gen, res)
+
+        Thread(target=run, daemon=True).start()
+
+    def _on_scan_finished(self, gen: int, res: dict):
+        self._scan_running = False
+        if self._scan_pending or gen != self._scan_gen:
+            # texto mudou durante a varredura; resultado descartado
+            self._scan_pending = False
+            self._scan_timer.start()
+            return
+        self.scan_results = res
+        self.scan_lbl.setText("\n".join(
+            f"{k}: {msg}" if n >= 0 else f"{k}: ✗ {msg}" for k, (n, msg) in res.items()
+        ))
+
+    def scan_errors(self) -> List[str]:
+        if not self.scan_results:
+            return []
+        return [f"{k}: {msg}" for k, (n, msg) in self.scan_results.items() if n < 0]
+
     def to_dict(self) -> dict:
         exts = [e.strip() for e in self.exts_edit.text().split(",") if e.strip()]
         cfg = {
@@ -95,6 +274,9 @@ class MonitorTab(QWidget):
             "fadename": self.fadename.text().strip() or "opaimg",
             "extensoes": exts if exts else [".png", ".jpg", ".jpeg", ".gif", ".bmp", ".mp4"],
         }
+        if self.offset.value() >= 0:
+            cfg["offset_segundos"] = round(float(self.offset.value()), 1)
+        cfg["cmd_timeout_segundos"] = round(float(self.cmd_timeout.value()), 1)
         return cfg
 
     def from_dict(self, cfg: dict):
@@ -107,6 +289,15 @@ class MonitorTab(QWidget):
             self.passo_fade.setValue(float(cfg.get("passo_fade", "0.05")))
         except Exception:
             self.passo_fade.setValue(0.05)
+        offset = cfg.get("offset_segundos")
+        try:
+            self.offset.setValue(OFFSET_AUTO if offset is None else float(offset))
+        except (TypeError, ValueError):
+            self.offset.setValue(OFFSET_AUTO)
+        try:
+            self.cmd_timeout.setValue(float(cfg.get("cmd_timeout_segundos", CMD_TIMEOUT)))
+        except (TypeError, ValueError):
+            self.cmd_timeout.setValue(CMD_TIMEOUT)
         self.aleatorio_chk.setChecked(bool(cfg.get("aleatorio", True)))
         exts = cfg.get("extensoes", [".png", ".jpg", ".jpeg", ".gif", ".bmp", ".mp4"])
         self.exts_edit.setText(",".join(exts))
@@ -114,6 +305,72 @@ class MonitorTab(QWidget):
         self.props_edit.setPlainText(props_to_text(props))
 
 
+class LogViewer(QDialog):
+    LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Logs")
+        self.resize(820, 420)
+        self._last_seq = 0
+        lay = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.level_cb = QComboBox()
+        # só níveis que o logger raiz de fato registra
+        self.level_cb.addItems([n for n in self.LEVELS if logging.getLevelName(n) >= level()])
+        self.level_cb.setCurrentText("INFO")
+        self.level_cb.currentTextChanged.connect(self._reload)
+        btn_clear = QPushButton("Clear view")
+        btn_clear.clicked.connect(lambda: self.text.clear())
+        top.addWidget(QLabel("Level:")); top.addWidget(self.level_cb); top.addWidget(btn_clear); top.addStretch()
+        lay.addLayout(top)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(5000)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        lay.addWidget(self.text)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, parent=self)
+        buttons.rejected.connect(self.close)
+        lay.addWidget(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self._poll)
+        self._reload()
+
+    def showEvent(self, ev):
+        self._timer.start()
+        self._poll()
+        super().showEvent(ev)
+
+    def hideEvent(self, ev):
+        self._timer.stop()
+        super().hideEvent(ev)
+
+    def _reload(self, *_):
+        self.text.clear()
+        self._last_seq = 0
+        self._poll()
+
+    def _poll(self):
+        rb = ring()
+        if rb is None:
+            return
+        entries = rb.entries(self._last_seq)
+        if not entries:
+            return
+        self._last_seq = entries[-1][0]
+        min_idx = self.LEVELS.index(self.level_cb.currentText())
+        linhas = [format_entry(e) for e in entries
+                  if e[2] not in self.LEVELS or self.LEVELS.index(e[2]) >= min_idx]
+        if linhas:
+            self.text.appendPlainText("\n".join(linhas))
+
+
 class MainWindow(QMainWindow):
     # Sinais para o controller
     startRequested = Signal()
@@ -121,6 +378,8 @@ class MainWindow(QMainWindow):
     loadRequested = Signal()
     saveRequested = Signal()
     exitRequested = Signal()
+    profileRequested = Signal()
+    profileFinished = Signal(str)
 
     def __init__(self):
         super().__init__()
@@ -129,9 +388,12 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(self.app_icon)
         self._in_shutdown = False
         self._tray_quit = False
+        self._log_viewer: LogViewer | None = None
+        self.thumbs = ThumbnailLoader(parent=self)
 
         self._build_ui()
         self._create_tray()
+        self.profileFinished.connect(self.notify_profile)
 
     # ---- ícone do app ----
     def _load_app_icon(self) -> QIcon:
@@ -156,10 +418,11 @@ class MainWindow(QMainWindow):
         self.autoplay_chk = QCheckBox("Autoplay")
         self.btn_start = QPushButton("Start")
         self.btn_stop = QPushButton("Stop")
+        self.btn_logs = QPushButton("Logs")
         self.btn_about = QPushButton("About")
 
         for b in [self.btn_add, self.btn_del, self.btn_load, self.btn_save,
-                  self.autoplay_chk, self.btn_start, self.btn_stop, self.btn_about]:
+                  self.autoplay_chk, self.btn_start, self.btn_stop, self.btn_logs, self.btn_about]:
             btn_row.addWidget(b)
         btn_row.addStretch()
         v.addLayout(btn_row)
@@ -170,6 +433,7 @@ class MainWindow(QMainWindow):
         self.btn_save.clicked.connect(self.saveRequested.emit)
         self.btn_start.clicked.connect(self.startRequested.emit)
         self.btn_stop.clicked.connect(self.stopRequested.emit)
+        self.btn_logs.clicked.connect(self.show_logs)
         self.btn_about.clicked.connect(self.show_about)
 
         # começa com 2 abas
@@ -210,6 +474,12 @@ class MainWindow(QMainWindow):
 
         menu.addSeparator()
 
+        act_profile = menu.addAction(ico_white(QStyle.SP_FileDialogDetailedView), "Profile (60 s)")
+        act_profile.triggered.connect(self.profileRequested.emit)
+
+        act_logs = menu.addAction(ico_white(QStyle.SP_FileDialogContentsView), "Logs")
+        act_logs.triggered.connect(self.show_logs)
+
         act_about = menu.addAction(ico_white(QStyle.SP_MessageBoxInformation), "About")
         act_about.triggered.connect(self.show_about)
 
@@ -228,7 +498,7 @@ class MainWindow(QMainWindow):
     # ---------- públicos usados pelo controller ----------
     def add_monitor_tab(self):
         idx = self.tabs.count() + 1
-        tab = MonitorTab(idx)
+        tab = MonitorTab(idx, self.thumbs)
         tab.monitor_edit.setText(str(idx))
         self.tabs.addTab(tab, f"Monitor {idx}")
 
@@ -250,6 +520,9 @@ class MainWindow(QMainWindow):
                 raise ValueError(f"Aba {i+1}: Monitor field is empty.")
             if not cfg["props"]:
                 raise ValueError(f"Aba {i+1}: Props field is empty.")
+            erros = tab.scan_errors()
+            if erros:
+                raise ValueError(f"Aba {i+1}: " + "; ".join(erros))
             cfgs.append(cfg)
         if not cfgs:
             raise ValueError("No monitor configured.")
@@ -258,12 +531,34 @@ class MainWindow(QMainWindow):
     def apply_configs(self, cfgs: List[dict]):
         self.tabs.clear()
         for i, cfg in enumerate(cfgs, start=1):
-            tab = MonitorTab(i)
+            tab = MonitorTab(i, self.thumbs)
             tab.from_dict(cfg)
             self.tabs.addTab(tab, f"Monitor {i}")
         if self.tabs.count() == 0:
             self.add_monitor_tab()
 
+    def tab_for_monitor(self, monitor: str) -> MonitorTab | None:
+        for i in range(self.tabs.count()):
+            tab: MonitorTab = self.tabs.widget(i)
+            if tab.monitor_edit.text().strip() == monitor:
+                return tab
+        return None
+
+    def show_previews(self, monitor: str, atual: Dict[str, str], proximas: Dict[str, str]):
+        tab = self.tab_for_monitor(monitor)
+        if tab is not None:
+            tab.preview.set_images(atual, proximas)
+
+    def clear_previews(self):
+        for i in range(self.tabs.count()):
+            self.tabs.widget(i).preview.clear()
+        self.set_tray_status([])
+
+    def set_tray_status(self, linhas: List[str]):
+        # tooltip do tray é texto puro no Windows: nomes da imagem atual e próxima
+        if hasattr(self, "tray"):
+            self.tray.setToolTip("\n".join([APP_NAME] + linhas))
+
     def set_autoplay(self, checked: bool):
         self.autoplay_chk.setChecked(bool(checked))
 
@@ -279,6 +574,14 @@ class MainWindow(QMainWindow):
     def show_error(self, title: str, text: str):
         QMessageBox.critical(self, title, text)
 
+    def show_logs(self):
+        if self._log_viewer is None:
+            self._log_viewer = LogViewer(self)
+            self._log_viewer.setWindowIcon(self.app_icon)
+        self._log_viewer.show()
+        self._log_viewer.raise_()
+        self._log_viewer.activateWindow()
+
     def show_about(self):
         dlg = QDialog(self)
         dlg.setWindowTitle("Sobre")
@@ -314,6 +617,10 @@ class MainWindow(QMainWindow):
                 2500,
             )
 
+    def notify_profile(self, path: str):
+        if hasattr(self, "tray"):
+            self.tray.showMessage(APP_NAME, f"Profile saved: {path}", QSystemTrayIcon.Information, 4000)
+
     def mark_shutdown(self):
         self._in_shutdown = True
 
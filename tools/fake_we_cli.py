@@ -0,0 +1,25 @@
+# Substituto do wallpaper32.exe para replay/soak: aceita os mesmos argumentos
+# de "-control applyProperties" e simula latência e falhas via ambiente.
+#   FAKE_WE_LATENCY=0.05   (segundos por comando)
+#   FAKE_WE_FAIL_RATE=0.01 (fração de comandos que retornam 1)
+import os
+import sys
+import time
+import random
+
+
+def main(argv):
+    if "-control" not in argv:
+        print("usage: fake_we_cli -control applyProperties -monitor N -properties RAW~(...)~END")
+        return 2
+    latency = float(os.environ.get("FAKE_WE_LATENCY", "0") or 0)
+    if latency > 0:
+        time.sleep(latency)
+    fail_rate = float(os.environ.get("FAKE_WE_FAIL_RATE", "0") or 0)
+    if fail_rate > 0 and random.random() < fail_rate:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
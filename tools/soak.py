@@ -0,0 +1,244 @@
+# Soak test: simula semanas de rotação em minutos com VirtualClock, pelo
+# orquestrador (executar_multimonitor_com_stop + SpawnBudget), com next/pause/
+# reload disparados durante o teste, e verifica que memória, threads,
+# _DIR_CACHE e cursores ficam estáveis.
+#   python tools/soak.py --days 14 --monitors 2 --files 20 --shuffle
+# Por padrão os comandos são executados em memória; --spawn roda o fake CLI
+# de verdade (um processo por comando, bem mais lento).
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from pathlib import Path
+from threading import Thread, Event
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import model  # noqa: E402
+from src.model import VirtualClock, PipelineControl, SpawnBudget, executar_multimonitor_com_stop  # noqa: E402
+from src.trace import FAKE_CLI, split_exe, to_argv  # noqa: E402
+
+RAW_PREFIX = "RAW~("
+
+
+def _make_folder(root: Path, n: int) -> Path:
+    pasta = root / "imgs"
+    pasta.mkdir(parents=True, exist_ok=True)
+    for i in range(n):
+        (pasta / f"img_{i:06d}.jpg").touch()
+    return pasta
+
+
+class _Stats:
+    def __init__(self, n_imgs: int):
+        self.n = n_imgs
+        self.rotacoes = 0
+        self.comandos = 0
+        self.por_monitor: Dict[str, int] = {}
+        self.passadas = 0
+        self.passadas_ruins = 0
+        self.vistos: Dict[tuple, set] = {}
+        self.lock = threading.Lock()
+
+    def rodada(self, monitor: str, props: Dict[str, str]) -> None:
+        with self.lock:
+            self.rotacoes += 1
+            n = self.por_monitor[monitor] = self.por_monitor.get(monitor, 0) + 1
+            for k, v in props.items():
+                vistos = self.vistos.setdefault((monitor, k), set())
+                vistos.add(v)
+                # cada passada deve mostrar todas as imagens exatamente uma vez
+                if n % self.n == 0:
+                    self.passadas += 1
+                    if len(vistos) != self.n:
+                        self.passadas_ruins += 1
+                    vistos.clear()
+
+
+class _Dispatcher:
+    # Substitui o processo do CLI no executor: registra a rodada e, quando o
+    # monitor passa do fim simulado, segura até o stop (que chega quando
+    # todos os monitores terminaram).
+    def __init__(self, clock: VirtualClock, ate: float, stats: _Stats, stop: Event, monitores: int, cli=None):
+        self.clock = clock
+        self.ate = ate
+        self.stats = stats
+        self.stop = stop
+        self.monitores = monitores
+        self.cli = cli
+        self.terminados: set = set()
+        self.lock = threading.Lock()
+
+    def __call__(self, cmd, timeout: float, stop_event):
+        args = split_exe(cmd)[1]
+        argv = to_argv([], args)
+        monitor = argv[3]
+        if self.clock.monotonic() >= self.ate:
+            with self.lock:
+                self.terminados.add(monitor)
+                if len(self.terminados) >= self.monitores:
+                    self.stop.set()
+            self.stop.wait()
+            return None
+        with self.stats.lock:
+            self.stats.comandos += 1
+        raw = argv[-1]
+        if raw.startswith(RAW_PREFIX) and '":' in raw:
+            d = json.loads(raw[len(RAW_PREFIX):-len(")~END")])
+            if not all(isinstance(v, (int, float)) for v in d.values()):
+                self.stats.rodada(monitor, d)
+        if self.cli is not None:
+            return model._rodar_filho(to_argv(self.cli, args), timeout, stop_event)
+        return 0
+
+
+def _perturbar(controls: Dict[str, PipelineControl], stop: Event, contagem: Dict[str, int], stats: _Stats) -> None:
+    # next / pause+resume / reload em momentos aleatórios, no máximo um a cada
+    # 5 rodadas: "next" pula a espera, que é o que avança o tempo simulado
+    rnd = random.Random(1)
+    ultima = 0
+    while not stop.wait(0.02):
+        ctls = list(controls.values())
+        if not ctls or stats.rotacoes - ultima < 5:
+            continue
+        ultima = stats.rotacoes
+        ctl = rnd.choice(ctls)
+        x = rnd.random()
+        if x < 0.6:
+            ctl.next()
+            contagem["next"] += 1
+        elif x < 0.8:
+            ctl.pause()
+            time.sleep(0.005)
+            ctl.resume()
+            contagem["pause"] += 1
+        else:
+            ctl.reload()
+            contagem["reload"] += 1
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Virtual-clock soak test through the multi-monitor orchestrator.")
+    ap.add_argument("--days", type=float, default=14.0)
+    ap.add_argument("--interval", type=float, default=60.0)
+    ap.add_argument("--monitors", type=int, default=2)
+    ap.add_argument("--files", type=int, default=20)
+    ap.add_argument("--folder", help="use an existing folder instead of generated files")
+    ap.add_argument("--fade-step", default="0.20")
+    ap.add_argument("--no-fade", action="store_true")
+    ap.add_argument("--shuffle", action="store_true")
+    ap.add_argument("--spawn", action="store_true", help="run the fake CLI for every command")
+    ap.add_argument("--no-perturb", action="store_true", help="do not send next/pause/reload")
+    ap.add_argument("--max-growth-kib", type=float, default=512.0)
+    ns = ap.parse_args(argv)
+
+    tmp = tempfile.TemporaryDirectory()
+    pasta = Path(ns.folder) if ns.folder else _make_folder(Path(tmp.name), ns.files)
+    exts = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".mp4")
+    n_imgs = len(model.list_images_cached(pasta, exts))
+    clock = VirtualClock()
+    ate = ns.days * 86400.0
+    stats = _Stats(n_imgs)
+    stop = Event()
+    controls: Dict[str, PipelineControl] = {}
+    dispatcher = _Dispatcher(clock, ate, stats, stop, ns.monitors,
+                             cli=[sys.executable, str(FAKE_CLI)] if ns.spawn else None)
+    budget = SpawnBudget(rate=1e6, burst=64, max_children=ns.monitors)
+    configs = [{
+        "exe_path": str(FAKE_CLI),
+        "monitor": str(m),
+        "props": {"_11": str(pasta)},
+        "passo_fade": ns.fade_step,
+        "intervalo_segundos": ns.interval,
+        "extensoes": list(exts),
+        "aleatorio": ns.shuffle,
+        "fade": not ns.no_fade,
+        "fadename": "opaimg",
+    } for m in range(1, ns.monitors + 1)]
+
+    threads_antes = threading.active_count()
+    cache_antes = len(model._DIR_CACHE)
+    tracemalloc.start()
+    t_ini = time.monotonic()
+
+    orq = Thread(
+        target=executar_multimonitor_com_stop,
+        args=(configs, stop),
+        kwargs={"controls": controls, "clock": clock, "budget": budget, "dispatcher": dispatcher},
+        name="soak-orchestrator",
+        daemon=True,
+    )
+    perturbacoes = {"next": 0, "pause": 0, "reload": 0}
+    perturbador = None
+    if not ns.no_perturb:
+        perturbador = Thread(target=_perturbar, args=(controls, stop, perturbacoes, stats), name="soak-perturb", daemon=True)
+
+    # linha de base de memória depois do aquecimento (primeira passada)
+    orq.start()
+    if perturbador is not None:
+        perturbador.start()
+    while stats.rotacoes < min(n_imgs, 50) * ns.monitors and orq.is_alive():
+        time.sleep(0.05)
+    base = tracemalloc.get_traced_memory()[0]
+    pico_rel = 0
+    while orq.is_alive():
+        orq.join(0.5)
+        pico_rel = max(pico_rel, tracemalloc.get_traced_memory()[0] - base)
+    if perturbador is not None:
+        perturbador.join()
+    fim_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    time.sleep(0.2)
+
+    crescimento = (fim_mem - base) / 1024
+    threads_depois = threading.active_count()
+    cache_depois = len(model._DIR_CACHE)
+    relatorio = {
+        "simulated_days": ns.days,
+        "wall_s": round(time.monotonic() - t_ini, 1),
+        "images": n_imgs,
+        "commands": stats.comandos,
+        "rotations": stats.rotacoes,
+        "rotations_per_monitor": stats.por_monitor,
+        "passes": stats.passadas,
+        "bad_passes": stats.passadas_ruins,
+        "perturbations": perturbacoes,
+        "mem_growth_kib": round(crescimento, 1),
+        "mem_peak_over_base_kib": round(pico_rel / 1024, 1),
+        "threads_before": threads_antes,
+        "threads_after": threads_depois,
+        "dir_cache_before": cache_antes,
+        "dir_cache_after": cache_depois,
+        "dir_cache_stats": model.listing_cache_stats(),
+        "spawn_budget": budget.stats(),
+    }
+    print(json.dumps(relatorio, indent=2))
+    tmp.cleanup()
+
+    falhas = []
+    if crescimento > ns.max_growth_kib:
+        falhas.append("memory growth")
+    if threads_depois > threads_antes:
+        falhas.append("thread leak")
+    if cache_depois > cache_antes:
+        falhas.append("dir cache growth")
+    if relatorio["dir_cache_stats"]["pins"]:
+        falhas.append("cache pins not released")
+    if stats.passadas_ruins:
+        falhas.append("incomplete passes")
+    if not stats.passadas:
+        falhas.append("no complete pass")
+    if falhas:
+        print("FAIL:", ", ".join(falhas))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())